@@ -28,6 +28,7 @@ from core import views as core_views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health-ping/', core_views.health_ping, name='health-ping'),
+    path('metrics', core_views.metrics_view, name='metrics'),
     path('api/schema', SpectacularAPIView.as_view(), name='api-schema'),
     path(
         'api/docs',
@@ -0,0 +1,148 @@
+"""
+Native async serving of selected DRF view actions under ASGI.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.urls import URLPattern
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+
+STREAM_BATCH_SIZE = 100
+
+
+async def iterate_in_thread(iterable, batch_size=STREAM_BATCH_SIZE):
+    """Yield the items of a sync iterable, fetching batches in a thread.
+
+    Django's ASGI handler reads a sync streaming body into one list, so
+    sync streaming responses are served through this instead.
+    """
+    iterator = iter(iterable)
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while batch := await next_batch():
+        for item in batch:
+            yield item
+
+
+class AsyncViewMixin:
+    """Serve actions listed in async_actions with async handlers.
+
+    An action ``name`` is handled by ``async_<name>`` without holding a
+    thread for the whole request; every other action runs the regular
+    sync view in a thread. For plain API views the action is the
+    lowercase HTTP method.
+    """
+
+    async_actions = ()
+
+    @classmethod
+    def as_async_view(cls, actions=None, **initkwargs):
+        """Return an async view callable for the class."""
+        if actions is None:
+            sync_view = cls.as_view(**initkwargs)
+        else:
+            actions = dict(actions)
+            if 'get' in actions and 'head' not in actions:
+                actions['head'] = actions['get']
+            sync_view = cls.as_view(actions, **initkwargs)
+
+        async def view(request, *args, **kwargs):
+            method = request.method.lower()
+            action = actions.get(method) if actions else method
+            if action not in cls.async_actions:
+                response = await sync_to_async(sync_view)(
+                    request, *args, **kwargs)
+                if response.streaming and not response.is_async:
+                    response.streaming_content = iterate_in_thread(
+                        response.streaming_content)
+                return response
+
+            self = cls(**initkwargs)
+            if actions is not None:
+                self.action_map = actions
+                for verb, name in actions.items():
+                    setattr(self, verb, getattr(self, name))
+            return await self.async_dispatch(
+                request, getattr(self, f'async_{action}'), *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        view.csrf_exempt = True
+        return view
+
+    async def async_dispatch(self, request, handler, *args, **kwargs):
+        """Run DRF's request handling around an async handler."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication may hit the database on a token cache miss
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+    async def async_get_object(self, queryset=None):
+        """Fetch the object for a detail action with the async ORM.
+
+        A given queryset, such as a values() one, is used as filtered.
+        """
+        if queryset is None:
+            queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def async_list(self, request, *args, **kwargs):
+        """Async version of ListModelMixin.list."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            # DRF paginators slice and evaluate the queryset themselves
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        objs = [obj async for obj in queryset]
+        return Response(self.get_serializer(objs, many=True).data)
+
+    async def async_retrieve(self, request, *args, **kwargs):
+        """Async version of RetrieveModelMixin.retrieve."""
+        instance = await self.async_get_object()
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncRouter(DefaultRouter):
+    """Router building async views for viewsets that support them."""
+
+    def get_urls(self):
+        """Swap in async views for AsyncViewMixin viewsets."""
+        urls = []
+        for url in super().get_urls():
+            view_class = getattr(url.callback, 'cls', None)
+            if (view_class is not None
+                    and issubclass(view_class, AsyncViewMixin)):
+                url = URLPattern(
+                    url.pattern,
+                    view_class.as_async_view(url.callback.actions,
+                                             **url.callback.initkwargs),
+                    url.default_args,
+                    url.name,
+                )
+            urls.append(url)
+
+        return urls
@@ -0,0 +1,135 @@
+"""
+Authentication classes for the API.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+USER_VERSION_KEY = 'auth:user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Return the shared version of a user's cached credentials."""
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate a user's cached credentials in every worker."""
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+class TokenCache:
+    """Thread safe LRU cache of token key to (user, token, version).
+
+    The cache lives in each worker process. Entries record the user's
+    shared version from the Django cache, and are ignored once another
+    process bumps it.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached entry for key or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store an entry for key, evicting the oldest entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop the entry for a token key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """Drop every entry resolving to the given user."""
+        with self._lock:
+            stale = [key for key, (_, (user, *_)) in self._entries.items()
+                     if user.pk == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the resolved user per token."""
+
+    def authenticate_credentials(self, key):
+        """Return (user, token) from cache, falling back to the database.
+
+        Cached users are read-only snapshots; views saving the user must
+        reload it first. The version is read before the user is loaded,
+        so a change committed in between is not cached as current.
+        """
+        cached = token_cache.get(key)
+        if cached is not None:
+            user_id = cached[0].pk
+        else:
+            user_id = self.get_model().objects.filter(key=key).values_list(
+                'user_id', flat=True).first()
+        version = get_user_version(user_id) if user_id is not None else None
+        if cached is not None and cached[2] != version:
+            cached = None
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            cached = (user, token, version)
+            if user.pk == user_id:
+                token_cache.set(key, cached)
+
+        user, token, _ = cached
+        return copy.copy(user), token
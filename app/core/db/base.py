@@ -0,0 +1,65 @@
+"""
+PostgreSQL backend that checks connections out of a per-process pool.
+"""
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.pool import close_pools, get_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Test database creation that lets go of pooled connections."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """Close idle pooled connections so the test database can drop."""
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Database wrapper returning connections to a pool on close.
+
+    The pool is configured with the POOL setting of the database; a
+    MAX_SIZE of 0 opens and closes connections like the stock backend.
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """Return the pool for these connection parameters, if enabled."""
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            return None
+
+        return get_pool(self.alias, repr(sorted(conn_params.items())), {
+            'max_size': options['MAX_SIZE'],
+            'timeout': options.get('TIMEOUT', 10),
+            'max_lifetime': options.get('MAX_LIFETIME', 1800),
+            'max_idle': options.get('MAX_IDLE', 300),
+            'health_checks': self.settings_dict['CONN_HEALTH_CHECKS'],
+        })
+
+    def get_new_connection(self, conn_params):
+        """Check a connection out of the pool."""
+        pool = self._pool = self.get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection = pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params))
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get(
+                'isolation_level', IsolationLevel.READ_COMMITTED))
+        return connection
+
+    def _close(self):
+        """Return the connection to the pool instead of closing it."""
+        pool = getattr(self, '_pool', None)
+        if self.connection is None or pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+        # The pool may hand the connection to another thread right away.
+        self.connection = None
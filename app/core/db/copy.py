@@ -0,0 +1,33 @@
+"""
+Bulk loading helpers for PostgreSQL.
+"""
+import csv
+import io
+
+
+def copy_rows(cursor, table, columns, rows, not_null=()):
+    """Load rows into a table with COPY.
+
+    Empty values load as NULL, except in the not_null columns where
+    they load as empty strings.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    options = 'FORMAT csv'
+    if not_null:
+        options += f', FORCE_NOT_NULL ({", ".join(not_null)})'
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH ({options})',
+        buffer,
+    )
+
+
+def allocate_ids(cursor, table, count):
+    """Reserve count ids from the serial sequence of a table."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+        'FROM generate_series(1, %s)',
+        [table, count],
+    )
+    return [row[0] for row in cursor.fetchall()]
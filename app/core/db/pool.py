@@ -0,0 +1,197 @@
+"""
+Per-process PostgreSQL connection pool with usage metrics.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2.extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """Thread safe pool of at most max_size open connections.
+
+    Connections are handed out most recently returned first, so extra
+    connections opened under load go idle and are closed after max_idle.
+    Every connection is closed once it is older than max_lifetime.
+    """
+
+    def __init__(self, max_size, timeout, max_lifetime, max_idle,
+                 health_checks=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_checks = health_checks
+        self.pid = os.getpid()
+        self._idle = deque()
+        self._born = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = dict.fromkeys([
+            'checkouts', 'waits', 'timeouts', 'wait_seconds_total',
+            'wait_seconds_max', 'connections_opened', 'connections_closed',
+        ], 0)
+
+    def getconn(self, connect):
+        """Return a pooled connection, opening one with connect if room."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                entry = None
+                while entry is None:
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        break
+                    else:
+                        if not waited:
+                            waited = True
+                            self._stats['waits'] += 1
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(
+                                f'No database connection free after '
+                                f'{self.timeout}s ({self.max_size} in use).')
+                        self._cond.wait(remaining)
+
+            if entry is None:
+                conn = self._open(connect)
+                break
+            conn, returned_at = entry
+            if self._reusable(conn, returned_at):
+                break
+            self._discard(conn)
+
+        self._record_checkout(time.monotonic() - start)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, closing it if unfit for reuse."""
+        if not discard and not conn.closed:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+        if discard or self._expired(conn, time.monotonic()):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Return counters and current pool usage."""
+        with self._cond:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def _open(self, connect):
+        """Open a new connection in a slot already reserved."""
+        try:
+            conn = connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._born[conn] = time.monotonic()
+            self._stats['connections_opened'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Close a connection and free its slot."""
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._born.pop(conn, None)
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._cond.notify()
+
+    def _expired(self, conn, now):
+        """Return whether a connection outlived max_lifetime."""
+        return now - self._born.get(conn, now) > self.max_lifetime
+
+    def _reusable(self, conn, returned_at):
+        """Return whether an idle connection can be handed out again."""
+        now = time.monotonic()
+        if (conn.closed or self._expired(conn, now)
+                or now - returned_at > self.max_idle):
+            return False
+        if self.health_checks:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _record_checkout(self, wait):
+        """Update checkout counters with the time spent waiting."""
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds_total'] += wait
+            self._stats['wait_seconds_max'] = max(
+                self._stats['wait_seconds_max'], wait)
+
+
+def get_pool(alias, key, options):
+    """Return the pool of this process for a database, creating it."""
+    with _pools_lock:
+        pool = _pools.get((alias, key))
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[(alias, key)] = ConnectionPool(**options)
+        return pool
+
+
+def close_pools():
+    """Close idle connections of every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """Return stats of every pool in this process by database alias."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    stats = {}
+    for (alias, _), pool in pools:
+        if pool.pid == os.getpid():
+            stats[alias] = pool.stats()
+    return stats
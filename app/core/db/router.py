@@ -0,0 +1,105 @@
+"""
+Database router sending safe API reads to replicas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = 'replica-pin:{user_id}'
+ROUTED_APPS = {'core'}
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def read_from_replica():
+    """Route reads of app models to a replica inside the block."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _replica_stream(content):
+    """Yield streamed chunks, each produced reading from a replica."""
+    iterator = iter(content)
+    while True:
+        with read_from_replica():
+            chunk = next(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def pin_to_primary(user_id):
+    """Send a user's reads to the primary until replicas catch up."""
+    cache.set(PIN_KEY.format(user_id=user_id), True,
+              settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """Return whether a user wrote within the pin window."""
+    return cache.get(PIN_KEY.format(user_id=user_id), False)
+
+
+class ReplicaRouter:
+    """Route reads to a random replica when asked to, writes to default."""
+
+    def db_for_read(self, model, **hints):
+        """Return a replica alias for reads inside read_from_replica."""
+        if (_use_replica.get() and settings.DATABASE_REPLICAS
+                and model._meta.app_label in ROUTED_APPS):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Always write to the primary."""
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations across aliases, they hold the same data."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Only migrate the primary, replicas follow it."""
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from replicas unless the user just wrote.
+
+    Authentication runs on the primary first, and any unsafe request
+    pins the user to the primary for REPLICA_PIN_SECONDS so they read
+    their own writes. Streamed bodies keep reading from the replica.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        """Switch reads to a replica after authentication."""
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and not is_pinned(request.user.pk)):
+            self._reads_replica = True
+            _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Switch reads back to the primary and pin writers."""
+        if getattr(self, '_reads_replica', False):
+            if response.streaming and not response.is_async:
+                # The body is read after the view returns
+                response.streaming_content = _replica_stream(
+                    response.streaming_content)
+            # Not a token reset, initial may run in a copied context
+            _use_replica.set(False)
+            self._reads_replica = False
+        elif (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and request.user.is_authenticated):
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,131 @@
+"""
+Django command comparing sync and async views under database latency.
+"""
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.db.pool import pool_stats
+from core.models import Recipe, Tag
+from recipe.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """Django command to benchmark async views against sync views.
+
+    The sync views handle requests one at a time like a uWSGI worker,
+    the async views handle them concurrently like one ASGI worker. Each
+    query sleeps for the given latency to stand in for a remote database.
+    """
+
+    help = ('Compare serial sync recipe views with concurrent async ones '
+            'under simulated database latency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--latency-ms', type=float, default=10)
+        parser.add_argument('--recipes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.create_user(
+            f'benchmark-{uuid.uuid4().hex}@example.com', uuid.uuid4().hex)
+        token = Token.objects.create(user=user)
+        tag = Tag.objects.create(user=user, name='Benchmark')
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f'Recipe {i}', time_minutes=i,
+                   price=Decimal('1.00'))
+            for i in range(max(options['recipes'], 1)))
+        for recipe in recipes:
+            recipe.tags.add(tag)
+        self.headers = {'Authorization': f'Token {token.key}'}
+        self.recipe_ids = [recipe.id for recipe in recipes]
+
+        delay = QueryDelay(options['latency_ms'] / 1000)
+        connection_created.connect(delay.install)
+        try:
+            delay.install(connection=connection)
+            results = {
+                'sync': self._run_sync(options['requests']),
+                'async': asyncio.run(self._run_async(
+                    options['requests'], options['concurrency'])),
+            }
+        finally:
+            connection_created.disconnect(delay.install)
+            connection.execute_wrappers.remove(delay)
+            user.delete()
+
+        for name, (elapsed, failures) in results.items():
+            self.stdout.write(
+                f'{name}: {options["requests"]} requests in {elapsed:.2f}s '
+                f'({options["requests"] / elapsed:.1f} req/s, '
+                f'{failures} failed)')
+        speedup = results['sync'][0] / results['async'][0]
+        self.stdout.write(f'speedup: {speedup:.1f}x')
+        self.stdout.write(f'pool: {pool_stats()}')
+
+    def _url(self, index):
+        """Return the path and id of the recipe for a request number."""
+        recipe_id = self.recipe_ids[index % len(self.recipe_ids)]
+        return reverse('recipe:recipe-detail', args=[recipe_id]), recipe_id
+
+    def _run_sync(self, requests):
+        """Serve requests one after another with the sync view."""
+        view = RecipeViewSet.as_view({'get': 'retrieve'})
+        factory = RequestFactory()
+        failures = 0
+        start = time.perf_counter()
+        for index in range(requests):
+            url, recipe_id = self._url(index)
+            response = view(factory.get(url, headers=self.headers),
+                            pk=recipe_id)
+            failures += response.status_code != 200
+
+        return time.perf_counter() - start, failures
+
+    async def _run_async(self, requests, concurrency):
+        """Serve requests concurrently with the async view."""
+        view = RecipeViewSet.as_async_view({'get': 'retrieve'})
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(index):
+            url, recipe_id = self._url(index)
+            async with semaphore, ThreadSensitiveContext():
+                # Per request context and cleanup, as in ASGIHandler
+                response = await view(factory.get(url, headers=self.headers),
+                                      pk=recipe_id)
+                await sync_to_async(close_old_connections)()
+            return response.status_code != 200
+
+        start = time.perf_counter()
+        failures = await asyncio.gather(*map(fetch, range(requests)))
+
+        return time.perf_counter() - start, sum(failures)
+
+
+class QueryDelay:
+    """Execute wrapper sleeping before every query."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        """Add the wrapper to a connection once."""
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
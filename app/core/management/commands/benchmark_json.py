@@ -0,0 +1,87 @@
+"""
+Django command comparing JSON renderers and parsers on recipe lists.
+"""
+import random
+import time
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+def recipe_list(count, seed=0):
+    """Return list response data of count recipes with nested relations."""
+    rng = random.Random(seed)
+    return {
+        'next': None,
+        'previous': None,
+        'results': [
+            {
+                'id': index,
+                'title': f'Recipe {index} crème brûlée',
+                'time_minutes': rng.randint(5, 180),
+                'price': f'{Decimal(rng.randint(100, 9999)) / 100:f}',
+                'link': 'https://example.com/recipe.pdf',
+                'tags': [{'id': rng.randint(1, 40), 'name': f'Tag {tag}'}
+                         for tag in range(rng.randint(0, 4))],
+                'ingredients': [
+                    {'id': rng.randint(1, 300),
+                     'name': f'Ingredient {ingredient}'}
+                    for ingredient in range(rng.randint(2, 12))],
+            }
+            for index in range(count)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the JSON renderer and parser."""
+
+    help = ('Compare encode/decode throughput of the DRF and orjson JSON '
+            'renderers and parsers on a large recipe list.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        data = recipe_list(options['recipes'])
+        content = JSONRenderer().render(data)
+        size = len(content) / 1024 / 1024
+        self.stdout.write(f'{options["recipes"]} recipes, {size:.2f} MiB')
+
+        results = {}
+        for name, renderer, parser in (
+                ('json', JSONRenderer(), JSONParser()),
+                ('orjson', ORJSONRenderer(), ORJSONParser())):
+            encode = self._best(options['repeat'],
+                                lambda: renderer.render(data))
+            decode = self._best(
+                options['repeat'],
+                lambda: parser.parse(BytesIO(content), None, {}))
+            results[name] = (encode, decode)
+            self.stdout.write(
+                f'{name}: encode {encode * 1000:.1f} ms '
+                f'({size / encode:.0f} MiB/s), '
+                f'decode {decode * 1000:.1f} ms ({size / decode:.0f} MiB/s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'orjson speedup: encode '
+            f'{results["json"][0] / results["orjson"][0]:.1f}x, decode '
+            f'{results["json"][1] / results["orjson"][1]:.1f}x'))
+
+    def _best(self, repeat, func):
+        """Return the fastest of repeat timed calls."""
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings)
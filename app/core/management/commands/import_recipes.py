@@ -0,0 +1,278 @@
+"""
+Django command to bulk import recipes from CSV or JSON lines files.
+"""
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.db.copy import copy_rows
+from core.models import ImportCheckpoint, Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+
+RECIPE_STAGE = 'import_recipe_stage'
+RELATION_STAGES = (
+    ('import_tag_stage', Tag, Recipe.tags.through, 'tag_id'),
+    ('import_ingredient_stage', Ingredient, Recipe.ingredients.through,
+     'ingredient_id'),
+)
+MAX_PRICE = Decimal('999.99')
+MAX_INTEGER = 2 ** 31 - 1
+
+
+class RowError(ValueError):
+    """Raised for an input row that cannot be imported."""
+
+
+def _text(value):
+    """Return a cell as text PostgreSQL can store."""
+    text = str(value or '')
+    if '\x00' in text:
+        raise RowError('text must not contain NUL characters')
+
+    return text
+
+
+def _names(value, separator):
+    """Normalize a tag/ingredient cell or list into a list of names."""
+    if isinstance(value, str):
+        value = value.split(separator)
+    if not isinstance(value, (list, type(None))):
+        raise RowError('tags and ingredients must be lists')
+    names = []
+    for item in value or []:
+        name = item.get('name') if isinstance(item, dict) else item
+        name = _text(name).strip()
+        if len(name) > 255:
+            raise RowError(f'name too long: {name[:20]}...')
+        if name:
+            names.append(name)
+
+    return list(dict.fromkeys(names))
+
+
+def decode_row(raw):
+    """Return an input row as a dict, decoding JSON lines."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise RowError('invalid JSON')
+    if not isinstance(raw, dict):
+        raise RowError('row must be an object')
+
+    return raw
+
+
+def parse_row(row, default_user, separator):
+    """Validate an input row and return it in staging form."""
+    row = decode_row(row)
+    title = _text(row.get('title')).strip()
+    if not title or len(title) > 255:
+        raise RowError('title is required and at most 255 characters')
+    link = _text(row.get('link'))
+    if len(link) > 255:
+        raise RowError('link is at most 255 characters')
+    try:
+        time_minutes = int(row.get('time_minutes'))
+        price = Decimal(str(row.get('price'))).quantize(Decimal('0.01'))
+    except (TypeError, ValueError, InvalidOperation):
+        raise RowError('time_minutes and price must be numbers')
+    if not -MAX_INTEGER - 1 <= time_minutes <= MAX_INTEGER:
+        raise RowError('time_minutes is out of range')
+    if not price.is_finite() or abs(price) > MAX_PRICE:
+        raise RowError('price must be below 1000')
+
+    return {
+        'email': _text(row.get('user') or default_user),
+        'title': title,
+        'description': _text(row.get('description')),
+        'time_minutes': time_minutes,
+        'price': price,
+        'link': link,
+        'tags': _names(row.get('tags'), separator),
+        'ingredients': _names(row.get('ingredients'), separator),
+    }
+
+
+def read_rows(path, file_format):
+    """Yield raw rows from the input file one at a time.
+
+    JSON lines are yielded undecoded so parse_row can reject bad ones.
+    """
+    with open(path, newline='', encoding='utf-8') as input_file:
+        if file_format == 'csv':
+            yield from csv.DictReader(input_file)
+        else:
+            for line in input_file:
+                if line.strip():
+                    yield line
+
+
+def merge_batch(batch):
+    """Load a batch through staging tables and merge it set-based.
+
+    Returns the ids of users that received recipes and the line numbers
+    skipped because their user does not exist.
+    """
+    user_table = get_user_model()._meta.db_table
+    recipe_table = Recipe._meta.db_table
+    stages = [RECIPE_STAGE] + [stage for stage, *_ in RELATION_STAGES]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {", ".join(stages)}')
+        cursor.execute(
+            f'CREATE TEMP TABLE {RECIPE_STAGE} ('
+            'line bigint PRIMARY KEY, email text, title text, '
+            'description text, time_minutes integer, price numeric(5, 2), '
+            'link text, user_id bigint, recipe_id bigint) ON COMMIT DROP'
+        )
+        copy_rows(cursor, RECIPE_STAGE,
+                  ['line', 'email', 'title', 'description', 'time_minutes',
+                   'price', 'link'],
+                  [(line, row['email'], row['title'], row['description'],
+                    row['time_minutes'], row['price'], row['link'])
+                   for line, row in batch])
+        cursor.execute(
+            f'UPDATE {RECIPE_STAGE} s SET user_id = u.id, '
+            f"recipe_id = nextval(pg_get_serial_sequence('{recipe_table}', "
+            f"'id')) FROM {user_table} u WHERE u.email = s.email"
+        )
+        cursor.execute(
+            f'INSERT INTO {recipe_table} (id, user_id, title, description, '
+            'time_minutes, price, link, image) '
+            "SELECT recipe_id, user_id, title, COALESCE(description, ''), "
+            "time_minutes, price, COALESCE(link, ''), '' "
+            f'FROM {RECIPE_STAGE} '
+            'WHERE user_id IS NOT NULL ORDER BY line'
+        )
+
+        for stage, model, through, column in RELATION_STAGES:
+            field = column[:-len('_id')]
+            cursor.execute(
+                f'CREATE TEMP TABLE {stage} (line bigint, name text) '
+                'ON COMMIT DROP'
+            )
+            copy_rows(cursor, stage, ['line', 'name'],
+                      [(line, name) for line, row in batch
+                       for name in row[f'{field}s']])
+            cursor.execute(
+                f'INSERT INTO {model._meta.db_table} (user_id, name) '
+                f'SELECT DISTINCT r.user_id, s.name FROM {stage} s '
+                f'JOIN {RECIPE_STAGE} r USING (line) '
+                'WHERE r.user_id IS NOT NULL '
+                'ON CONFLICT (user_id, name) DO NOTHING'
+            )
+            cursor.execute(
+                f'INSERT INTO {through._meta.db_table} (recipe_id, {column}) '
+                f'SELECT r.recipe_id, o.id FROM {stage} s '
+                f'JOIN {RECIPE_STAGE} r USING (line) '
+                f'JOIN {model._meta.db_table} o '
+                'ON o.user_id = r.user_id AND o.name = s.name '
+                'ON CONFLICT DO NOTHING'
+            )
+
+        cursor.execute(
+            f'SELECT DISTINCT user_id FROM {RECIPE_STAGE} '
+            'WHERE user_id IS NOT NULL'
+        )
+        user_ids = [user_id for user_id, in cursor.fetchall()]
+        cursor.execute(
+            f'SELECT recipe_id FROM {RECIPE_STAGE} WHERE user_id IS NOT NULL'
+        )
+        recipe_ids = [recipe_id for recipe_id, in cursor.fetchall()]
+        cursor.execute(
+            f'SELECT line FROM {RECIPE_STAGE} WHERE user_id IS NULL '
+            'ORDER BY line'
+        )
+        missing_user_lines = [line for line, in cursor.fetchall()]
+
+    Recipe.objects.filter(id__in=recipe_ids).update_search_vector()
+    return user_ids, missing_user_lines
+
+
+class Command(BaseCommand):
+    """Django command to bulk import recipes with COPY."""
+
+    help = ('Import recipes with tags and ingredients from a CSV or JSON '
+            'lines file, resuming from the last committed batch.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format, guessed from the extension '
+                                 'by default.')
+        parser.add_argument('--user',
+                            help='Email of the owner for rows without a '
+                                 'user column.')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--separator', default='|',
+                            help='Separator for tags/ingredients in CSV.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the saved checkpoint.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('import_recipes requires PostgreSQL.')
+
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist.')
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=path)
+        if options['restart']:
+            checkpoint.position = 0
+            checkpoint.save()
+        start = checkpoint.position
+        if start:
+            self.stdout.write(f'Resuming after row {start}...')
+
+        imported = skipped = 0
+        batch = []
+        line = start
+        for line, raw in enumerate(read_rows(path, file_format), start=1):
+            if line <= start:
+                continue
+            try:
+                batch.append((line, parse_row(raw, options['user'],
+                                              options['separator'])))
+            except RowError as error:
+                skipped += 1
+                self.stderr.write(f'Row {line} skipped: {error}')
+            if line - start >= options['batch_size']:
+                count, missing = self._commit(batch, checkpoint, line)
+                imported += count
+                skipped += missing
+                start, batch = line, []
+                self.stdout.write(
+                    f'Processed {line} rows: {imported} imported, '
+                    f'{skipped} skipped'
+                )
+
+        if line > start:
+            count, missing = self._commit(batch, checkpoint, line)
+            imported += count
+            skipped += missing
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Import finished: {imported} imported, {skipped} skipped'))
+
+    def _commit(self, batch, checkpoint, line):
+        """Merge a batch and advance the checkpoint in one transaction."""
+        with transaction.atomic():
+            user_ids, missing = merge_batch(batch) if batch else ([], [])
+            checkpoint.position = line
+            checkpoint.save()
+
+        for user_id in user_ids:
+            bump_version(user_id)
+        for missing_line in missing:
+            self.stderr.write(f'Row {missing_line} skipped: unknown user')
+
+        return len(batch) - len(missing), len(missing)
@@ -0,0 +1,242 @@
+"""
+Django command to generate a synthetic dataset for benchmarks.
+"""
+import itertools
+import os
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.db.copy import allocate_ids, copy_rows
+from core.models import Recipe, Tag, Ingredient
+
+TAG_WORDS = [
+    'vegan', 'vegetarian', 'gluten free', 'dairy free', 'quick', 'easy',
+    'breakfast', 'lunch', 'dinner', 'dessert', 'snack', 'soup', 'salad',
+    'italian', 'mexican', 'indian', 'thai', 'japanese', 'chinese', 'french',
+    'greek', 'spanish', 'turkish', 'korean', 'bbq', 'baking', 'healthy',
+    'comfort food', 'spicy', 'sweet', 'low carb', 'high protein', 'keto',
+    'one pot', 'slow cooker', 'grill', 'summer', 'winter', 'party', 'kids',
+]
+INGREDIENT_WORDS = [
+    'salt', 'pepper', 'olive oil', 'garlic', 'onion', 'butter', 'sugar',
+    'flour', 'egg', 'milk', 'tomato', 'lemon', 'chicken', 'beef', 'pork',
+    'rice', 'pasta', 'potato', 'carrot', 'celery', 'basil', 'parsley',
+    'cilantro', 'cumin', 'paprika', 'ginger', 'soy sauce', 'honey',
+    'cheese', 'cream', 'yogurt', 'spinach', 'mushroom', 'bell pepper',
+    'zucchini', 'chickpeas', 'lentils', 'beans', 'tofu', 'salmon', 'shrimp',
+    'coconut milk', 'chili', 'oregano', 'thyme', 'rosemary', 'vinegar',
+    'mustard', 'avocado', 'lime', 'cabbage', 'broccoli', 'corn', 'peas',
+    'bacon', 'sausage', 'walnuts', 'almonds', 'oats', 'banana', 'apple',
+    'strawberry', 'chocolate', 'vanilla', 'cinnamon', 'bread', 'noodles',
+]
+DISHES = ['stew', 'curry', 'bake', 'salad', 'soup', 'stir fry', 'pie',
+          'tacos', 'risotto', 'pasta', 'bowl', 'skillet', 'roast', 'wraps']
+ADJECTIVES = ['easy', 'creamy', 'spicy', 'smoky', 'crispy', 'classic',
+              'quick', 'rustic', 'hearty', 'zesty', 'golden', 'fresh']
+IMAGE_POOL_SIZE = 50
+
+
+def zipf_weights(count, exponent):
+    """Return cumulative Zipf weights for ranks 1..count."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def vocabulary(words, size):
+    """Return size distinct names, numbering words once exhausted."""
+    return [words[index % len(words)]
+            + (f' {index // len(words)}' if index >= len(words) else '')
+            for index in range(size)]
+
+
+def write_images(rng, seed, count):
+    """Write a pool of generated JPEGs and return their media paths."""
+    from PIL import Image
+
+    directory = os.path.join('uploads', 'recipe')
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, directory), exist_ok=True)
+    paths = []
+    for index in range(min(count, IMAGE_POOL_SIZE)):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        path = os.path.join(directory, f'seed-{seed}-{index}.jpg')
+        Image.new('RGB', (800, 600), color).save(
+            os.path.join(settings.MEDIA_ROOT, path), quality=80)
+        paths.append(path)
+
+    return paths
+
+
+class Command(BaseCommand):
+    """Django command to seed users, recipes, tags and ingredients.
+
+    The same options and seed always generate the same data. Recipes
+    per user follow a Zipf distribution, and so do tags and ingredients
+    within each user's vocabulary, so a few are reused on most recipes.
+    """
+
+    help = 'Generate a deterministic synthetic dataset with COPY.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--user-skew', type=float, default=1.1,
+                            help='Zipf exponent of recipes per user.')
+        parser.add_argument('--name-skew', type=float, default=1.0,
+                            help='Zipf exponent of tag/ingredient reuse.')
+        parser.add_argument('--tag-vocabulary', type=int, default=40)
+        parser.add_argument('--ingredient-vocabulary', type=int,
+                            default=300)
+        parser.add_argument('--images', type=int, default=0,
+                            help='Number of recipes given an image.')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--email-prefix', default='seed')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--skip-search-vector', action='store_true',
+                            help='Leave search vectors empty, faster.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('seed_data requires PostgreSQL.')
+        if options['users'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--users and --batch-size must be positive.')
+
+        rng = random.Random(options['seed'])
+        emails = [f'{options["email_prefix"]}-{options["seed"]}-{index}'
+                  '@example.com' for index in range(options['users'])]
+        if get_user_model().objects.filter(email=emails[0]).exists():
+            raise CommandError(
+                'This dataset exists, use another --email-prefix or --seed.')
+
+        start = time.perf_counter()
+        owners = rng.choices(
+            range(len(emails)), k=options['recipes'],
+            cum_weights=zipf_weights(len(emails), options['user_skew']))
+        # Written before any rows commit, so a failure leaves no dataset
+        image_paths = []
+        if options['images'] > 0:
+            image_paths = write_images(rng, options['seed'],
+                                       options['images'])
+        with_image = set(rng.sample(range(options['recipes']),
+                                    min(options['images'],
+                                        options['recipes'])))
+        user_ids = self._create_users(emails, options['password'])
+        owners = [user_ids[index] for index in owners]
+
+        self.relations = []
+        for model, through, column, words, size, per_recipe in (
+                (Tag, Recipe.tags.through, 'tag_id', TAG_WORDS,
+                 options['tag_vocabulary'], (0, 4)),
+                (Ingredient, Recipe.ingredients.through, 'ingredient_id',
+                 INGREDIENT_WORDS, options['ingredient_vocabulary'],
+                 (2, 12))):
+            names = vocabulary(words, max(size, 1))
+            self.relations.append((
+                model, through, column, names, per_recipe,
+                zipf_weights(len(names), options['name_skew']), {}))
+        rows = 0
+        for offset in range(0, options['recipes'], options['batch_size']):
+            indexes = range(offset, min(offset + options['batch_size'],
+                                        options['recipes']))
+            rows += self._create_batch(
+                rng, indexes, owners, with_image, image_paths,
+                options['skip_search_vector'])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{indexes.stop} recipes, {rows} rows in {elapsed:.1f}s')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users and {options["recipes"]} recipes '
+            f'({rows} rows, {rows / elapsed * 60:,.0f} rows/minute)'))
+
+    def _create_users(self, emails, password):
+        """Insert users sharing one password hash and return their ids."""
+        table = get_user_model()._meta.db_table
+        password = make_password(password)
+        with transaction.atomic(), connection.cursor() as cursor:
+            ids = allocate_ids(cursor, table, len(emails))
+            copy_rows(
+                cursor, table,
+                ['id', 'password', 'is_superuser', 'email', 'name',
+                 'is_active', 'is_staff'],
+                [(user_id, password, False, email, f'Seed user {index}',
+                  True, False)
+                 for index, (user_id, email) in enumerate(zip(ids, emails))])
+
+        return ids
+
+    def _create_batch(self, rng, indexes, owners, with_image, image_paths,
+                      skip_search_vector):
+        """Insert one batch of recipes with their relations."""
+        recipes = []
+        links = [[] for _ in self.relations]
+        title_words = self.relations[1][3][:50]
+        for index in indexes:
+            owner = owners[index]
+            title = (f'{rng.choice(ADJECTIVES).title()} '
+                     f'{rng.choice(title_words)} '
+                     f'{rng.choice(DISHES)}')
+            description = '' if rng.random() < 0.3 else (
+                f'A {rng.choice(ADJECTIVES)} {rng.choice(DISHES)} '
+                f'for {rng.randint(1, 8)} people.')
+            image = (image_paths[index % len(image_paths)]
+                     if index in with_image else '')
+            recipes.append([
+                owner, title, description, rng.randint(5, 180),
+                f'{rng.randint(100, 9999) / 100:.2f}', '', image])
+            for relation, relation_links in zip(self.relations, links):
+                names, (low, high), weights = relation[3:6]
+                picks = rng.choices(range(len(names)), cum_weights=weights,
+                                    k=rng.randint(low, high))
+                relation_links.append(
+                    [(owner, pick) for pick in dict.fromkeys(picks)])
+
+        recipe_table = Recipe._meta.db_table
+        rows = len(recipes)
+        with transaction.atomic(), connection.cursor() as cursor:
+            recipe_ids = allocate_ids(cursor, recipe_table, len(recipes))
+            copy_rows(
+                cursor, recipe_table,
+                ['id', 'user_id', 'title', 'description', 'time_minutes',
+                 'price', 'link', 'image'],
+                [[recipe_id, *recipe]
+                 for recipe_id, recipe in zip(recipe_ids, recipes)],
+                not_null=['description', 'link', 'image'])
+            for relation, relation_links in zip(self.relations, links):
+                rows += self._link(cursor, relation, recipe_ids,
+                                   relation_links)
+            if not skip_search_vector:
+                Recipe.objects.filter(
+                    id__in=recipe_ids).update_search_vector()
+
+        return rows
+
+    def _link(self, cursor, relation, recipe_ids, relation_links):
+        """Create missing names and through rows for a batch."""
+        model, through, column, names, _, _, ids = relation
+        missing = list(dict.fromkeys(
+            key for keys in relation_links for key in keys
+            if key not in ids))
+        if missing:
+            new_ids = allocate_ids(cursor, model._meta.db_table,
+                                   len(missing))
+            copy_rows(cursor, model._meta.db_table, ['id', 'user_id', 'name'],
+                      [(new_id, owner, names[pick])
+                       for new_id, (owner, pick) in zip(new_ids, missing)])
+            ids.update(zip(missing, new_ids))
+
+        through_rows = [(recipe_id, ids[key])
+                        for recipe_id, keys in zip(recipe_ids, relation_links)
+                        for key in keys]
+        copy_rows(cursor, through._meta.db_table, ['recipe_id', column],
+                  through_rows)
+
+        return len(missing) + len(through_rows)
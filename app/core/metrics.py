@@ -0,0 +1,293 @@
+"""
+Request and database metrics shared across worker processes.
+
+Each process records into an in-memory registry and periodically writes
+a snapshot to METRICS_DIR; the /metrics endpoint sums the snapshots of
+all processes and renders them in the Prometheus text format.
+"""
+import bisect
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requests by view, action, method and status.', None),
+    'http_request_duration_seconds': (
+        'histogram', 'Request latency.', LATENCY_BUCKETS),
+    'http_response_size_bytes': (
+        'histogram', 'Response body size.', SIZE_BUCKETS),
+    'http_request_db_queries': (
+        'histogram', 'Database queries per request.', QUERY_COUNT_BUCKETS),
+    'http_request_db_seconds': (
+        'histogram', 'Database time per request.', LATENCY_BUCKETS),
+    'db_pool_events_total': (
+        'counter', 'Connection pool events by database and event.', None),
+    'db_pool_wait_seconds_total': (
+        'counter', 'Time spent waiting for a pooled connection.', None),
+    'db_pool_connections': (
+        'gauge', 'Pooled connections by database and state.', None),
+    'token_cache_events_total': (
+        'counter', 'Token cache hits and misses.', None),
+}
+
+_request_stats = ContextVar('request_stats', default=None)
+_last_flush = 0.0
+
+
+class RequestStats:
+    """Query count and time of the request being served."""
+
+    __slots__ = ('queries', 'query_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+def track_request():
+    """Start collecting query stats for the current request."""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def stop_tracking():
+    """Stop collecting query stats."""
+    _request_stats.set(None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper adding query time to the current request."""
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - start
+
+
+def install_query_counter(connection, **kwargs):
+    """Add count_queries to a new connection once."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Registry:
+    """Thread safe counters and histograms of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._histograms = {}
+
+    def inc(self, name, labels, value=1):
+        """Add value to a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] += value
+
+    def observe(self, name, labels, value):
+        """Record a value in a histogram."""
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket plus +Inf, then the sum
+                histogram = self._histograms[key] = [0] * (len(buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def merge_histogram(self, name, labels, histogram):
+        """Add bucket counts and sum of another histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            current = self._histograms.setdefault(key, [0] * len(histogram))
+            for index, value in enumerate(histogram):
+                current[index] += value
+
+    def snapshot(self):
+        """Return the registry as JSON serializable rows."""
+        with self._lock:
+            return {
+                'values': [[name, dict(labels), value]
+                           for (name, labels), value in self._values.items()],
+                'histograms': [[name, dict(labels), list(histogram)]
+                               for (name, labels), histogram
+                               in self._histograms.items()],
+            }
+
+
+registry = Registry()
+
+
+def _process_snapshot():
+    """Return this process's registry plus pool and token cache stats."""
+    from core.authentication import token_cache
+    from core.db.pool import pool_stats
+
+    gauges = Registry()
+    for alias, stats in pool_stats().items():
+        for event in ('checkouts', 'waits', 'timeouts',
+                      'connections_opened', 'connections_closed'):
+            gauges.inc('db_pool_events_total',
+                       {'database': alias, 'event': event}, stats[event])
+        gauges.inc('db_pool_wait_seconds_total', {'database': alias},
+                   stats['wait_seconds_total'])
+        for state in ('idle', 'in_use'):
+            gauges.inc('db_pool_connections',
+                       {'database': alias, 'state': state}, stats[state])
+    cache_stats = token_cache.stats()
+    for event in ('hits', 'misses'):
+        gauges.inc('token_cache_events_total', {'event': event},
+                   cache_stats[event])
+
+    snapshot = registry.snapshot()
+    snapshot['values'] += gauges.snapshot()['values']
+    return snapshot
+
+
+def maybe_flush():
+    """Write a snapshot if the flush interval passed."""
+    global _last_flush
+    now = time.monotonic()
+    if now - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        _last_flush = now
+        flush()
+
+
+def flush():
+    """Atomically write this process's snapshot to METRICS_DIR."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(_process_snapshot(), tmp_file)
+        os.replace(tmp_path, os.path.join(directory, f'{os.getpid()}.json'))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _is_alive(pid):
+    """Return whether a process exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshots():
+    """Yield the snapshots other processes wrote to METRICS_DIR."""
+    pattern = os.path.join(settings.METRICS_DIR, '*.json')
+    for path in glob.glob(pattern):
+        pid = int(os.path.basename(path).split('.')[0])
+        if pid == os.getpid():
+            continue
+        try:
+            with open(path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (OSError, ValueError):
+            continue
+        if not _is_alive(pid):
+            # Counters of exited workers still count, their gauges do not
+            snapshot['values'] = [
+                row for row in snapshot['values']
+                if METRICS[row[0]][0] != 'gauge'
+            ]
+        yield snapshot
+
+
+def collect():
+    """Return metrics of every process summed by name and labels."""
+    snapshots = [_process_snapshot()]
+    if settings.METRICS_DIR:
+        snapshots.extend(_read_snapshots())
+
+    merged = Registry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['values']:
+            merged.inc(name, labels, value)
+        for name, labels, histogram in snapshot['histograms']:
+            merged.merge_histogram(name, labels, histogram)
+
+    return merged
+
+
+def _labels(labels, **extra):
+    """Format a label set."""
+    labels = {**labels, **extra}
+    if not labels:
+        return ''
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+        for value in labels.values()
+    )
+    return '{' + ','.join(
+        f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    """Format a sample value."""
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render(merged):
+    """Render merged metrics in the Prometheus text format."""
+    snapshot = merged.snapshot()
+    rows = defaultdict(list)
+    for name, labels, value in snapshot['values']:
+        rows[name].append((labels, value))
+    for name, labels, histogram in snapshot['histograms']:
+        rows[name].append((labels, histogram))
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        if name not in rows:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(rows[name], key=lambda row: str(row[0])):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (math.inf,), value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket'
+                             f'{_labels(labels, le=_number(bound))} '
+                             f'{cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+
+    return '\n'.join(lines) + '\n'
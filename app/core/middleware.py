@@ -0,0 +1,71 @@
+"""
+Middleware for the app.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from core import metrics
+
+
+class MetricsMiddleware:
+    """Record latency, size, status and database use of every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        stats = metrics.track_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.stop_tracking()
+        self._record(request, response, stats, time.perf_counter() - start)
+        metrics.maybe_flush()
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.track_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.stop_tracking()
+        self._record(request, response, stats, time.perf_counter() - start)
+        metrics.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Remember the viewset action handling the request."""
+        actions = getattr(view_func, 'actions', None)
+        if actions:
+            request.metrics_action = actions.get(request.method.lower(), '')
+
+    def _record(self, request, response, stats, elapsed):
+        """Add one request to the registry."""
+        match = request.resolver_match
+        labels = {
+            'view': match.view_name if match else 'unmatched',
+            'action': getattr(request, 'metrics_action', ''),
+            'method': request.method,
+        }
+        registry = metrics.registry
+        registry.inc('http_requests_total',
+                     {**labels, 'status': str(response.status_code)})
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.observe('http_request_db_queries', labels, stats.queries)
+        registry.observe('http_request_db_seconds', labels,
+                         stats.query_seconds)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels,
+                             len(response.content))
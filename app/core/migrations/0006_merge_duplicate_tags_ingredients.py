@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:54
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge tags/ingredients sharing a (user, name) into the oldest row"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field in (('Tag', 'tag'), ('Ingredient', 'ingredient')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, f'{field}s').through
+        duplicates = (
+            model.objects.values('user', 'name')
+            .annotate(keep_id=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for group in duplicates:
+            drop_ids = list(
+                model.objects.filter(user=group['user'], name=group['name'])
+                .exclude(id=group['keep_id'])
+                .values_list('id', flat=True)
+            )
+            recipe_ids = set(
+                through.objects.filter(**{f'{field}_id__in': drop_ids})
+                .values_list('recipe_id', flat=True)
+            )
+            through.objects.bulk_create(
+                [through(recipe_id=recipe_id,
+                         **{f'{field}_id': group['keep_id']})
+                 for recipe_id in recipe_ids],
+                ignore_conflicts=True,
+            )
+            model.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
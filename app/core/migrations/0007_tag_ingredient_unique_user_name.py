@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:54
+
+from django.db import migrations, models
+
+
+def unique_user_name(model_name, table, name):
+    """Add a (user, name) unique constraint over a concurrent index build"""
+    return migrations.SeparateDatabaseAndState(
+        database_operations=[
+            migrations.RunSQL(
+                sql=[
+                    f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                    f'ON {table} (user_id, name);',
+                    f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                    f'UNIQUE USING INDEX {name};',
+                ],
+                reverse_sql=(f'ALTER TABLE {table} '
+                             f'DROP CONSTRAINT IF EXISTS {name};'),
+            ),
+        ],
+        state_operations=[
+            migrations.AddConstraint(
+                model_name=model_name,
+                constraint=models.UniqueConstraint(fields=('user', 'name'), name=name),
+            ),
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_merge_duplicate_tags_ingredients'),
+    ]
+
+    operations = [
+        unique_user_name('ingredient', 'core_ingredient',
+                         'unique_ingredient_user_name'),
+        unique_user_name('tag', 'core_tag', 'unique_tag_user_name'),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:57
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def through_index(table, column):
+    """Build a concurrent reverse index on an M2M through table"""
+    name = f'{table}_{column}_recipe_idx'
+    return migrations.RunSQL(
+        sql=(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+             f'ON {table} ({column}, recipe_id);'),
+        reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS {name};',
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_tag_ingredient_unique_user_name'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx'),
+        ),
+        through_index('core_recipe_tags', 'tag_id'),
+        through_index('core_recipe_ingredients', 'ingredient_id'),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:18
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='ingredient_name_prefix_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='tag_name_prefix_idx'),
+        ),
+    ]
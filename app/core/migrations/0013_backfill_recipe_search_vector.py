@@ -0,0 +1,46 @@
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+BACKFILL_SQL = """
+UPDATE core_recipe r SET search_vector =
+    setweight(to_tsvector('english', coalesce(r.title, '')), 'A')
+    || setweight(to_tsvector('english',
+        coalesce((SELECT string_agg(t.name, ' ') FROM core_tag t
+                  JOIN core_recipe_tags rt ON rt.tag_id = t.id
+                  WHERE rt.recipe_id = r.id), '')
+        || ' ' ||
+        coalesce((SELECT string_agg(i.name, ' ') FROM core_ingredient i
+                  JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+                  WHERE ri.recipe_id = r.id), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(r.description, '')), 'C')
+WHERE r.id >= %s AND r.id < %s AND r.search_vector IS NULL
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Fill missing search vectors in id ranges, committing each batch"""
+    Recipe = apps.get_model('core', 'Recipe')
+    ids = Recipe.objects.using(schema_editor.connection.alias).order_by('id')
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(first.id, last.id + 1, BATCH_SIZE):
+            cursor.execute(BACKFILL_SQL, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own, so rows are only locked per batch
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_tag_ingredient_name_prefix_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors,
+                             migrations.RunPython.noop),
+    ]
@@ -5,7 +5,12 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -56,6 +61,32 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+SEARCH_CONFIG = 'english'
+
+
+def _names_subquery(model):
+    """Space separated names of a recipe's related tags/ingredients"""
+    return Coalesce(Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('name', ' '))
+        .values('names')
+    ), models.Value(''), output_field=models.TextField())
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Queryset for recipes"""
+
+    def update_search_vector(self):
+        """Recompute the stored search vector of the selected recipes"""
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(_names_subquery(Tag), _names_subquery(Ingredient),
+                           weight='B', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        ))
+
+
 class Recipe(models.Model):
     """Recipe Model"""
 
@@ -71,6 +102,17 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='recipe_user_id_desc_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='recipe_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -85,6 +127,17 @@ class Tag(models.Model):
     )
     name = models.CharField(max_length=255)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_tag_user_name'),
+        ]
+        indexes = [
+            models.Index(F('user'),
+                         OpClass(Upper('name'), name='text_pattern_ops'),
+                         name='tag_name_prefix_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -98,5 +151,27 @@ class Ingredient(models.Model):
     )
     name = models.CharField(max_length=255)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_ingredient_user_name'),
+        ]
+        indexes = [
+            models.Index(F('user'),
+                         OpClass(Upper('name'), name='text_pattern_ops'),
+                         name='ingredient_name_prefix_idx'),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class ImportCheckpoint(models.Model):
+    """Last committed row of a bulk import, for resuming after failure"""
+
+    source = models.CharField(max_length=1024, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}:{self.position}'
@@ -0,0 +1,37 @@
+"""
+Renderers for the app.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, byte for byte like JSONRenderer.
+
+    Types orjson does not know, such as Decimal and lazy strings, are
+    converted by DRF's encoder. Indented output falls back to the stdlib
+    encoder, as orjson only indents by two spaces.
+    """
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON bytes."""
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder.default,
+                           option=OPTIONS)
+        # Escape the separators valid in JSON but not in JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,115 @@
+"""
+Signal handlers for core models.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.db import transaction
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import bump_user_version, token_cache
+from core.models import Recipe, Tag, Ingredient
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Forget a deleted token."""
+    token_cache.invalidate(instance.key)
+    transaction.on_commit(lambda: bump_user_version(instance.user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Forget cached tokens of a changed or deleted user."""
+    token_cache.invalidate_user(instance.pk)
+    # Other workers see the bump only once the change is visible
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
+
+
+def _flush_search_vectors(connection):
+    """Recompute the search vectors collected on a connection."""
+    recipe_ids = connection.pending_search_vector_ids
+    if recipe_ids:
+        connection.pending_search_vector_ids = set()
+        Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+
+
+def refresh_search_vectors(recipe_ids):
+    """Recompute search vectors of recipes once the transaction commits.
+
+    Recipes changed several times in one transaction are recomputed by a
+    single UPDATE.
+    """
+    connection = transaction.get_connection()
+    if not hasattr(connection, 'pending_search_vector_ids'):
+        connection.pending_search_vector_ids = set()
+    connection.pending_search_vector_ids.update(recipe_ids)
+    # Registered every time, as a rollback discards earlier callbacks
+    transaction.on_commit(lambda: _flush_search_vectors(connection))
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields=None,
+                                **kwargs):
+    """Refresh the search vector of a saved recipe."""
+    if update_fields is None or {'title', 'description'} & update_fields:
+        refresh_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_linked_search_vectors(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Refresh search vectors of recipes whose tags/ingredients changed."""
+    if action == 'pre_clear' and reverse:
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True))
+    if not action.startswith('post_') or (
+            action != 'post_clear' and not pk_set):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'post_clear':
+        recipe_ids = instance._search_recipe_ids
+    else:
+        recipe_ids = pk_set
+    refresh_search_vectors(recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_named_search_vectors(sender, instance, created, **kwargs):
+    """Refresh search vectors of recipes using a renamed tag/ingredient."""
+    if not created:
+        transaction.on_commit(instance.recipe_set.update_search_vector)
+
+
+def _deleted_directly(sender, origin):
+    """Return whether a delete started from sender rather than a cascade."""
+    model = getattr(origin, 'model', type(origin))
+    return model is sender
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_named_recipes(sender, instance, origin=None, **kwargs):
+    """Remember recipes of a tag/ingredient about to be deleted."""
+    if _deleted_directly(sender, origin):
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_unnamed_search_vectors(sender, instance, **kwargs):
+    """Refresh search vectors of recipes of a deleted tag/ingredient."""
+    recipe_ids = getattr(instance, '_search_recipe_ids', None)
+    if recipe_ids:
+        refresh_search_vectors(recipe_ids)
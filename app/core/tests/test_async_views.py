@@ -0,0 +1,145 @@
+"""
+Tests for async serving of API views.
+"""
+import asyncio
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.async_views import AsyncRouter
+from core.authentication import token_cache
+from core.models import Recipe, Tag
+from recipe.views import RecipeViewSet, TagViewSet
+from user.views import ManageUserView
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+ME_URL = reverse('user:me')
+
+
+class AsyncViewTests(TestCase):
+    """Test async views answer like their sync counterparts."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123', name='Test Name')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.factory = AsyncRequestFactory()
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=10,
+            price=Decimal('5.50'))
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+    async def test_recipe_list_matches_sync(self):
+        """Test the async recipe list returns the sync payload."""
+        view = RecipeViewSet.as_async_view({'get': 'list'})
+
+        res = await view(self.factory.get(RECIPES_URL, headers=self.headers))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        await cache.aclear()
+        sync_res = await self.async_sync_get(RECIPES_URL)
+        self.assertEqual(res.data, sync_res.data)
+        self.assertIn('ETag', res)
+
+    async def test_recipe_detail_matches_sync(self):
+        """Test the async recipe detail returns the sync payload."""
+        view = RecipeViewSet.as_async_view({'get': 'retrieve'})
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+        res = await view(self.factory.get(url, headers=self.headers),
+                         pk=self.recipe.id)
+
+        sync_res = await self.async_sync_get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, sync_res.data)
+
+    async def test_other_users_recipe_not_found(self):
+        """Test the async detail view is limited to the user's recipes."""
+        view = RecipeViewSet.as_async_view({'get': 'retrieve'})
+
+        res = await view(self.factory.get(RECIPES_URL, headers=self.headers),
+                         pk=0)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_tag_list_matches_sync(self):
+        """Test the async tag list returns the sync payload."""
+        view = TagViewSet.as_async_view({'get': 'list'})
+
+        res = await view(self.factory.get(TAGS_URL, headers=self.headers))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': res.data[0]['id'],
+                                     'name': 'Vegan'}])
+
+    async def test_me_matches_sync(self):
+        """Test the async profile view returns the sync payload."""
+        view = ManageUserView.as_async_view()
+
+        res = await view(self.factory.get(ME_URL, headers=self.headers))
+
+        sync_res = await self.async_sync_get(ME_URL)
+        self.assertEqual(res.data, sync_res.data)
+
+    async def test_unsafe_method_uses_sync_view(self):
+        """Test writes fall back to the sync view."""
+        view = ManageUserView.as_async_view()
+
+        res = await view(self.factory.patch(
+            ME_URL, {'name': 'New name'}, content_type='application/json',
+            headers=self.headers))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'New name')
+
+    async def test_streaming_body_iterated_async(self):
+        """Test sync streamed bodies are served as async iterators."""
+        view = RecipeViewSet.as_async_view({'get': 'export'})
+        url = reverse('recipe:recipe-export')
+
+        res = await view(self.factory.get(url, headers=self.headers))
+        lines = [line async for line in res]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['title'], 'Soup')
+
+    async def test_unauthenticated_rejected(self):
+        """Test the async views still require authentication."""
+        view = RecipeViewSet.as_async_view({'get': 'list'})
+
+        res = await view(AsyncRequestFactory().get(RECIPES_URL))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_router_builds_async_views(self):
+        """Test the async router serves async viewsets with async views."""
+        router = AsyncRouter()
+        router.register('recipes', RecipeViewSet)
+
+        views = {url.name: url.callback for url in router.urls}
+
+        self.assertTrue(
+            asyncio.iscoroutinefunction(views['recipe-list']))
+        self.assertFalse(asyncio.iscoroutinefunction(views['api-root']))
+
+    async def async_sync_get(self, url):
+        """Fetch a URL through the regular sync views."""
+        return await sync_to_async(self.client.get)(url)
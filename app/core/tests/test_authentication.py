@@ -0,0 +1,184 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    TokenCache,
+    bump_user_version,
+    get_user_version,
+    token_cache,
+)
+
+ME_URL = reverse('user:me')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email,
+                                                password=password)
+
+
+class TokenCacheTests(TestCase):
+    """Test the LRU/TTL token cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full."""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        cache.get('a')
+        cache.set('c', 'C')
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'C')
+
+    @patch('core.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped after the TTL."""
+        cache = TokenCache(max_size=2, ttl=60)
+        patched_monotonic.return_value = 100
+        cache.set('a', 'A')
+
+        patched_monotonic.return_value = 161
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_counts_hits_and_misses(self):
+        """Test hit and miss counters."""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.get('a')
+        cache.set('a', 'A')
+        cache.get('a')
+
+        self.assertEqual(cache.stats(),
+                         {'hits': 1, 'misses': 1, 'size': 1})
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        """Test a repeated token is resolved from the cache."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token stops authenticating."""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test a deactivated user stops authenticating."""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_refreshes_cache(self):
+        """Test updating the user through the API is seen next request."""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated name')
+
+    def test_change_in_other_worker_invalidates(self):
+        """Test a bumped user version is seen by cached entries."""
+        self.client.get(ME_URL)
+        # Another worker saves the user; only the shared version is bumped
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            name='Renamed')
+        bump_user_version(self.user.pk)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Renamed')
+
+    def test_change_during_load_not_cached(self):
+        """Test a version bumped while loading the user is not cached."""
+        load = TokenAuthentication.authenticate_credentials
+
+        def load_then_deactivate(auth, key):
+            user, token = load(auth, key)
+            # Another worker deactivates the user before the cache write
+            get_user_model().objects.filter(pk=self.user.pk).update(
+                is_active=False)
+            bump_user_version(self.user.pk)
+            return user, token
+
+        with patch.object(TokenAuthentication, 'authenticate_credentials',
+                          load_then_deactivate):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_version_bumped_on_commit(self):
+        """Test saving a user bumps the shared version after commit."""
+        version = get_user_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            self.assertEqual(get_user_version(self.user.pk), version)
+
+        self.assertNotEqual(get_user_version(self.user.pk), version)
+
+    def test_update_does_not_save_cached_user(self):
+        """Test writes do not restore the password from a cached user."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=make_password('newpass123'))
+
+        res = self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Updated name')
+        self.assertTrue(self.user.check_password('newpass123'))
+
+    def test_update_rejects_deactivated_user(self):
+        """Test writes are refused for a user deactivated elsewhere."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False)
+
+        res = self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, '')
@@ -1,12 +1,21 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from core.models import ImportCheckpoint, Recipe, Tag, Ingredient
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -30,3 +39,234 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _write(self, name, content):
+        """Write an input file and return its path."""
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as input_file:
+            input_file.write(content)
+        return path
+
+    def _call(self, *args):
+        """Run the command with output captured."""
+        call_command('import_recipes', *args, stdout=StringIO(),
+                     stderr=StringIO())
+
+    def test_import_csv(self):
+        """Test importing recipes with tags and ingredients from CSV."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        path = self._write('recipes.csv', (
+            'user,title,time_minutes,price,tags,ingredients\n'
+            'user@example.com,Soup,20,4.50,Dinner|Vegan,Salt|Water\n'
+            'user@example.com,Steak,15,12.00,Dinner,Salt\n'
+        ))
+
+        self._call(path, '--batch-size', '1')
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual([r.title for r in recipes], ['Soup', 'Steak'])
+        soup, steak = recipes
+        self.assertEqual(soup.price, Decimal('4.50'))
+        self.assertEqual(set(soup.tags.values_list('name', flat=True)),
+                         {'Dinner', 'Vegan'})
+        self.assertEqual(list(steak.ingredients.values_list('name',
+                                                            flat=True)),
+                         ['Salt'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(),
+                         2)
+
+    def test_import_jsonl_skips_invalid_rows(self):
+        """Test JSON lines import with default user and bad rows."""
+        path = self._write('recipes.jsonl', '\n'.join([
+            json.dumps({'title': 'Soup', 'time_minutes': 20, 'price': 4,
+                        'tags': ['Dinner']}),
+            json.dumps({'title': '', 'time_minutes': 1, 'price': 1}),
+            json.dumps({'title': 'Pie', 'time_minutes': 'x', 'price': 1}),
+            json.dumps({'user': 'nobody@example.com', 'title': 'Tea',
+                        'time_minutes': 1, 'price': 1}),
+        ]))
+
+        self._call(path, '--user', self.user.email)
+
+        self.assertEqual(list(Recipe.objects.values_list('title', flat=True)),
+                         ['Soup'])
+        recipe = Recipe.objects.get()
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(list(recipe.tags.values_list('name', flat=True)),
+                         ['Dinner'])
+
+    def test_import_jsonl_skips_malformed_lines(self):
+        """Test malformed and non-object JSON lines are skipped."""
+        path = self._write('recipes.jsonl', '\n'.join([
+            '{"title": "Soup", "time_minutes": 20,',
+            '[1, 2]',
+            '"Soup"',
+            json.dumps({'title': 'Pie', 'time_minutes': 1, 'price': 1,
+                        'tags': 5}),
+            json.dumps({'title': 'Tea', 'time_minutes': 1, 'price': 1}),
+        ]))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, '--user', self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(list(Recipe.objects.values_list('title', flat=True)),
+                         ['Tea'])
+        for line in range(1, 5):
+            self.assertIn(f'Row {line} skipped', stderr.getvalue())
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).position,
+                         5)
+
+    def test_import_skips_values_postgres_rejects(self):
+        """Test out of range integers and NUL characters are skipped."""
+        path = self._write('recipes.jsonl', '\n'.join([
+            json.dumps({'title': 'Soup', 'time_minutes': 3000000000,
+                        'price': 1}),
+            json.dumps({'title': 'Pie\x00', 'time_minutes': 1, 'price': 1}),
+            json.dumps({'title': 'Stew', 'time_minutes': 1, 'price': 1,
+                        'description': 'a\x00b'}),
+            json.dumps({'title': 'Cake', 'time_minutes': 1, 'price': 1,
+                        'tags': ['Sweet\x00']}),
+            json.dumps({'title': 'Flan', 'time_minutes': 1, 'price': 'NaN'}),
+            json.dumps({'title': 'Tea', 'time_minutes': -2 ** 31,
+                        'price': 1}),
+        ]))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, '--user', self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(list(Recipe.objects.values_list('title', flat=True)),
+                         ['Tea'])
+        for line in range(1, 6):
+            self.assertIn(f'Row {line} skipped', stderr.getvalue())
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).position,
+                         6)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test rows before the saved checkpoint are not imported again."""
+        path = self._write('recipes.csv', (
+            'user,title,time_minutes,price\n'
+            'user@example.com,Soup,20,4.50\n'
+            'user@example.com,Steak,15,12.00\n'
+        ))
+        ImportCheckpoint.objects.create(source=path, position=1)
+
+        self._call(path)
+
+        self.assertEqual(list(Recipe.objects.values_list('title', flat=True)),
+                         ['Steak'])
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).position,
+                         2)
+
+        self._call(path)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+
+class BenchmarkAsyncCommandTests(TransactionTestCase):
+    """Test the async views benchmark command."""
+
+    def test_benchmark_serves_and_cleans_up(self):
+        """Test both runs succeed and the benchmark data is removed."""
+        out = StringIO()
+
+        call_command('benchmark_async', requests=4, concurrency=2,
+                     latency_ms=0, recipes=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('sync: 4 requests', output)
+        self.assertIn('async: 4 requests', output)
+        self.assertEqual(output.count('0 failed'), 2)
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+
+class SeedDataCommandTests(TestCase):
+    """Test the seed_data command."""
+
+    def _seed(self, prefix, **options):
+        """Seed a small dataset and return its recipes in order."""
+        call_command('seed_data', users=5, recipes=40, seed=3,
+                     email_prefix=prefix, batch_size=15, stdout=StringIO(),
+                     **options)
+        return Recipe.objects.filter(
+            user__email__startswith=f'{prefix}-').order_by('id')
+
+    def test_seed_data(self):
+        """Test users, recipes and relations are created."""
+        recipes = self._seed('a')
+
+        self.assertEqual(get_user_model().objects.count(), 5)
+        self.assertEqual(recipes.count(), 40)
+        recipe = recipes.first()
+        self.assertTrue(recipe.ingredients.exists())
+        self.assertTrue(all(
+            tag.user_id == recipe.user_id for tag in recipe.tags.all()))
+        self.assertFalse(recipes.filter(search_vector=None).exists())
+        user = get_user_model().objects.get(email='a-3-0@example.com')
+        self.assertTrue(user.check_password('password'))
+
+    def test_seed_data_deterministic(self):
+        """Test the same seed generates the same recipes."""
+        fields = ['title', 'description', 'time_minutes', 'price',
+                  'user__name']
+
+        first = list(self._seed('a', skip_search_vector=True)
+                     .values_list(*fields))
+        second = list(self._seed('b', skip_search_vector=True)
+                      .values_list(*fields))
+
+        self.assertEqual(first, second)
+        self.assertGreater(Recipe.objects.filter(
+            user__email='a-3-0@example.com').count(), 8)
+
+    def test_seed_data_images(self):
+        """Test images are only written when requested."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        with self.settings(MEDIA_ROOT=media_root):
+            self._seed('a', skip_search_vector=True)
+            self.assertEqual(os.listdir(media_root), [])
+
+            recipes = self._seed('b', skip_search_vector=True, images=3)
+
+        self.assertEqual(recipes.exclude(image='').count(), 3)
+        self.assertTrue(os.listdir(os.path.join(media_root, 'uploads',
+                                                'recipe')))
+
+    def test_seed_data_image_failure_leaves_no_users(self):
+        """Test failing to write images can be retried with the seed."""
+        with patch('core.management.commands.seed_data.write_images',
+                   side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self._seed('a', images=3)
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertEqual(self._seed('a').count(), 40)
+
+
+class BenchmarkJsonCommandTests(SimpleTestCase):
+    """Test the JSON benchmark command."""
+
+    def test_benchmark_json(self):
+        """Test both renderers and parsers are measured."""
+        out = StringIO()
+
+        call_command('benchmark_json', recipes=20, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('json: encode', output)
+        self.assertIn('orjson: encode', output)
+        self.assertIn('orjson speedup', output)
@@ -0,0 +1,114 @@
+"""
+Tests for the pooled database backend.
+"""
+from unittest.mock import MagicMock, patch
+
+import psycopg2.extensions
+from django.db import connections
+from django.test import SimpleTestCase, TestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+def fake_connection():
+    """Return a stand-in for an idle psycopg2 connection."""
+    conn = MagicMock(closed=0)
+    conn.info.transaction_status = (
+        psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+    return conn
+
+
+def create_pool(**params):
+    """Create and return a pool with short limits."""
+    defaults = {
+        'max_size': 2,
+        'timeout': 0.01,
+        'max_lifetime': 60,
+        'max_idle': 60,
+    }
+    defaults.update(params)
+    return ConnectionPool(**defaults)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool."""
+
+    def test_returned_connection_reused(self):
+        """Test a returned connection is handed out again."""
+        pool = create_pool()
+        conn = pool.getconn(fake_connection)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(fake_connection), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_exhausted_pool_times_out(self):
+        """Test checkout waits then fails when every connection is used."""
+        pool = create_pool(max_size=1)
+        pool.getconn(fake_connection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(fake_connection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    @patch('core.db.pool.time.monotonic')
+    def test_old_connection_replaced(self, patched_monotonic):
+        """Test connections past max lifetime are closed on return."""
+        pool = create_pool(max_lifetime=60)
+        patched_monotonic.return_value = 100
+        conn = pool.getconn(fake_connection)
+
+        patched_monotonic.return_value = 161
+        pool.putconn(conn)
+
+        conn.close.assert_called_once()
+        self.assertIsNot(pool.getconn(fake_connection), conn)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+    def test_open_transaction_rolled_back(self):
+        """Test a connection returned mid transaction is rolled back."""
+        pool = create_pool()
+        conn = pool.getconn(fake_connection)
+        conn.info.transaction_status = (
+            psycopg2.extensions.TRANSACTION_STATUS_INTRANS)
+
+        pool.putconn(conn)
+
+        conn.rollback.assert_called_once()
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_broken_connection_discarded(self):
+        """Test a connection failing the health check is replaced."""
+        pool = create_pool(health_checks=True)
+        conn = pool.getconn(fake_connection)
+        pool.putconn(conn)
+        conn.cursor.side_effect = psycopg2.OperationalError
+
+        self.assertIsNot(pool.getconn(fake_connection), conn)
+        self.assertEqual(pool.stats()['size'], 1)
+
+
+class PooledBackendTests(TestCase):
+    """Test the database backend checking connections out of a pool."""
+
+    def test_connection_reused_after_close(self):
+        """Test closing a connection keeps the server session open."""
+        wrapper = connections.create_connection('default')
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                first_pid = cursor.fetchone()[0]
+            wrapper.close()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                second_pid = cursor.fetchone()[0]
+        finally:
+            wrapper.close()
+
+        self.assertEqual(first_pid, second_pid)
@@ -0,0 +1,109 @@
+"""
+Tests for routing reads to database replicas.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.router import ReplicaRouter, read_from_replica
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the replica router."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads go to the primary outside read_from_replica."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_reads_use_replica_when_asked(self):
+        """Test app model reads go to a replica inside read_from_replica."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_0')
+
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_other_apps_use_primary(self):
+        """Test models outside the API apps are never read from replicas."""
+        from rest_framework.authtoken.models import Token
+
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Token))
+
+    def test_writes_and_migrations_use_primary(self):
+        """Test writes and migrations stay on the primary."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+@patch('core.db.router.random.choice', side_effect=lambda aliases: aliases[0])
+class ReplicaReadApiTests(TestCase):
+    """Test which API requests read from replicas."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_reads_from_replica(self, patched_choice):
+        """Test a safe request reads from a replica."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_choice.assert_called()
+
+    def test_write_pins_user_to_primary(self, patched_choice):
+        """Test reads after a write go to the primary."""
+        payload = {'title': 'Sample', 'time_minutes': 5, 'price': '5.00'}
+        res = self.client.post(RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        patched_choice.reset_mock()
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+        patched_choice.assert_not_called()
+
+    def test_pin_is_per_user(self, patched_choice):
+        """Test another user's write does not pin this user."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        other_client.post(RECIPES_URL, {
+            'title': 'Sample', 'time_minutes': 5, 'price': '5.00'})
+        patched_choice.reset_mock()
+
+        self.client.get(RECIPES_URL)
+
+        patched_choice.assert_called()
+
+    def test_export_body_reads_from_replica(self, patched_choice):
+        """Test the streamed export body still reads from a replica."""
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5,
+                              price='5.00')
+        res = self.client.get(reverse('recipe:recipe-export'))
+        patched_choice.reset_mock()
+
+        lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 1)
+        patched_choice.assert_called()
@@ -0,0 +1,182 @@
+"""
+Tests for request metrics and the metrics endpoint.
+"""
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RegistryTests(SimpleTestCase):
+    """Test recording and rendering metrics."""
+
+    def test_render_histogram(self):
+        """Test histograms render cumulative buckets, sum and count."""
+        registry = metrics.Registry()
+        registry.observe('http_request_db_queries', {'view': 'a'}, 1)
+        registry.observe('http_request_db_queries', {'view': 'a'}, 3)
+
+        text = metrics.render(registry)
+
+        self.assertIn('# TYPE http_request_db_queries histogram', text)
+        self.assertIn('http_request_db_queries_bucket{view="a",le="0"} 0',
+                      text)
+        self.assertIn('http_request_db_queries_bucket{view="a",le="1"} 1',
+                      text)
+        self.assertIn('http_request_db_queries_bucket{view="a",le="5"} 2',
+                      text)
+        self.assertIn('http_request_db_queries_bucket{view="a",le="+Inf"} 2',
+                      text)
+        self.assertIn('http_request_db_queries_sum{view="a"} 4', text)
+        self.assertIn('http_request_db_queries_count{view="a"} 2', text)
+
+    def test_render_escapes_labels(self):
+        """Test label values are escaped."""
+        registry = metrics.Registry()
+        registry.inc('http_requests_total', {'view': 'a"b\\c'})
+
+        text = metrics.render(registry)
+
+        self.assertIn('http_requests_total{view="a\\"b\\\\c"} 1', text)
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test requests are recorded by the middleware."""
+
+    def setUp(self):
+        metrics.registry = metrics.Registry()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_recorded_by_view_and_action(self):
+        """Test status, latency, size and queries are recorded."""
+        self.client.get(RECIPES_URL)
+
+        labels = 'action="list",method="GET",view="recipe:recipe-list"'
+        text = metrics.render(metrics.registry)
+        self.assertIn('http_requests_total{action="list",method="GET",'
+                      'status="200",view="recipe:recipe-list"} 1', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 1',
+                      text)
+        self.assertIn(f'http_response_size_bytes_count{{{labels}}} 1', text)
+        self.assertIn(
+            f'http_request_db_queries_bucket{{{labels},le="0"}} 0', text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        """Test the endpoint renders the Prometheus text format."""
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'view="recipe:recipe-list"', res.content)
+        self.assertIn(b'token_cache_events_total', res.content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token_required(self):
+        """Test a configured token protects the endpoint."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        """Test the endpoint needs a token unless DEBUG is on."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with self.settings(DEBUG=True):
+            res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(DEBUG=True)
+    def test_pool_wait_seconds_counter(self):
+        """Test pool wait time has its own counter, not an event."""
+        stats = dict.fromkeys(
+            ['checkouts', 'waits', 'timeouts', 'wait_seconds_total',
+             'connections_opened', 'connections_closed', 'idle',
+             'in_use'], 0)
+        stats['wait_seconds_total'] = 1.5
+
+        with patch('core.db.pool.pool_stats',
+                   return_value={'default': stats}):
+            res = self.client.get(METRICS_URL)
+
+        text = res.content.decode()
+        self.assertIn('# TYPE db_pool_wait_seconds_total counter', text)
+        self.assertIn('db_pool_wait_seconds_total{database="default"} 1.5',
+                      text)
+        self.assertNotIn('event="wait_seconds"', text)
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    """Test metrics of worker processes are summed."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_override = override_settings(
+            METRICS_DIR=self.directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        metrics.registry = metrics.Registry()
+
+    def _write_snapshot(self, pid, snapshot):
+        """Write a snapshot as if from another worker."""
+        path = os.path.join(self.directory.name, f'{pid}.json')
+        with open(path, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+
+    def test_workers_summed(self):
+        """Test counters and histograms of other workers are added."""
+        metrics.registry.inc('http_requests_total', {'view': 'a'})
+        metrics.registry.observe('http_request_db_queries', {'view': 'a'}, 2)
+        metrics.flush()
+        other = metrics.Registry()
+        other.inc('http_requests_total', {'view': 'a'}, 2)
+        other.observe('http_request_db_queries', {'view': 'a'}, 3)
+        self._write_snapshot(os.getppid(), other.snapshot())
+
+        text = metrics.render(metrics.collect())
+
+        self.assertIn('http_requests_total{view="a"} 3', text)
+        self.assertIn('http_request_db_queries_count{view="a"} 2', text)
+        self.assertIn('http_request_db_queries_sum{view="a"} 5', text)
+
+    def test_exited_worker_gauges_dropped(self):
+        """Test gauges of exited workers are ignored, counters kept."""
+        dead_pid = 2 ** 22 + 1
+        self._write_snapshot(dead_pid, {
+            'values': [
+                ['db_pool_connections',
+                 {'database': 'default', 'state': 'idle'}, 4],
+                ['http_requests_total', {'view': 'a'}, 5],
+            ],
+            'histograms': [],
+        })
+
+        text = metrics.render(metrics.collect())
+
+        self.assertIn('http_requests_total{view="a"} 5', text)
+        self.assertNotIn('db_pool_connections{database="default",'
+                         'state="idle"} 4', text)
@@ -4,6 +4,7 @@ Tests for models
 from unittest.mock import patch
 from decimal import Decimal
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -78,6 +79,14 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Tag')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag')
+
     def test_create_ingredient(self):
         """Test creating an ingredient is successful"""
         user = create_user()
@@ -85,6 +94,14 @@ class ModelTests(TestCase):
                                                       name='Ingredient')
         self.assertEqual(str(ingredient), ingredient.name)
 
+    def test_ingredient_name_unique_per_user(self):
+        """Test a user cannot have two ingredients with the same name"""
+        user = create_user()
+        models.Ingredient.objects.create(user=user, name='Ingredient')
+
+        with self.assertRaises(IntegrityError):
+            models.Ingredient.objects.create(user=user, name='Ingredient')
+
     @patch('core.models.uuid.uuid4')
     def test_recipe_file_name_uuid(self, mock_uuid):
         """Test generating image path"""
@@ -0,0 +1,105 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.functional import lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the renderer matches JSONRenderer."""
+
+    def assertRendersLikeDRF(self, data, media_type=None):
+        """Assert both renderers produce the same bytes."""
+        self.assertEqual(ORJSONRenderer().render(data, media_type),
+                         JSONRenderer().render(data, media_type))
+
+    def test_recipe_data(self):
+        """Test nested serializer data with Decimal and unicode."""
+        data = ReturnDict({
+            'results': ReturnList([
+                {'id': 1, 'title': 'Crème brûlée', 'price': '5.50',
+                 'cost': Decimal('5.50'), 'link': '', 'image': None,
+                 'tags': [{'id': 2, 'name': 'Dessert'}]},
+            ], serializer=None),
+            'next': None,
+        }, serializer=None)
+
+        self.assertRendersLikeDRF(data)
+
+    def test_dates_and_lazy_strings(self):
+        """Test dates, times, UUIDs and lazy strings."""
+        lazy_str = lazy(lambda: 'Lazy', str)
+        data = {
+            'aware': datetime.datetime(2024, 1, 2, 3, 4, 5, 678,
+                                       tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(
+                2024, 1, 2, 3, 4, 5,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4),
+            'now': timezone.now(),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(3, 4, 5),
+            'duration': datetime.timedelta(minutes=90),
+            'uuid': uuid.UUID(int=1),
+            'lazy': lazy_str(),
+            1: 'integer key',
+        }
+
+        self.assertRendersLikeDRF(data)
+
+    def test_line_separators_escaped(self):
+        """Test U+2028 and U+2029 are escaped like JSONRenderer."""
+        self.assertRendersLikeDRF({'title': 'a\u2028b\u2029c'})
+
+    def test_indent(self):
+        """Test indented output falls back to the stdlib encoder."""
+        self.assertRendersLikeDRF({'id': 1, 'tags': [1, 2]},
+                                  'application/json; indent=4')
+
+    def test_none(self):
+        """Test no data renders an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test the parser matches JSONParser."""
+
+    def _parse(self, parser, content, encoding='utf-8'):
+        """Parse raw content with a parser."""
+        return parser.parse(BytesIO(content), 'application/json',
+                            {'encoding': encoding})
+
+    def test_parse(self):
+        """Test parsing a JSON body."""
+        content = '{"title": "Crème", "price": 5.5, "tags": [{"id": 1}]}'
+
+        self.assertEqual(
+            self._parse(ORJSONParser(), content.encode()),
+            self._parse(JSONParser(), content.encode()))
+
+    def test_parse_other_encoding(self):
+        """Test the request encoding is honoured."""
+        content = '{"title": "Crème"}'.encode('latin-1')
+
+        self.assertEqual(self._parse(ORJSONParser(), content, 'latin-1'),
+                         {'title': 'Crème'})
+
+    def test_invalid_json(self):
+        """Test invalid JSON raises a parse error."""
+        for content in [b'{"title": ', b'{"price": NaN}', b'\xff']:
+            with self.assertRaises(ParseError):
+                self._parse(ORJSONParser(), content)
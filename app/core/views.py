@@ -1,11 +1,32 @@
 """
 Core views for app.
 """
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core import metrics
+
 
 @api_view(['GET'])
 def health_ping(request):
     """Returns successful response."""
     return Response({'healthy': True})
+
+
+def metrics_view(request):
+    """Returns metrics of all workers in the Prometheus text format."""
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        # Without a token the endpoint is only open in development.
+        allowed = settings.DEBUG
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.render(metrics.collect()),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,142 @@
+""" Per-user versioned response cache and ETags for Recipe API"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'recipe:version:{user_id}'
+RESPONSE_KEY = 'recipe:response:{user_id}:{version}:{digest}'
+
+
+def get_version(user_id):
+    """Return the current cache version for a user"""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user"""
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def response_cache_key(request):
+    """Build the cache key for a request from user, path and params"""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = f'{request.path}?{urlencode(params)}'
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+
+    return RESPONSE_KEY.format(user_id=request.user.pk,
+                               version=get_version(request.user.pk),
+                               digest=digest)
+
+
+def response_etag(request, key):
+    """Build a strong ETag for the cache key and negotiated media type"""
+    raw = f'{key}:{request.accepted_media_type}'
+
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the client already holds the ETag"""
+    header = request.headers.get('If-None-Match')
+    if header is None:
+        return None
+
+    if etag in parse_etags(header):
+        return Response(status=status.HTTP_304_NOT_MODIFIED,
+                        headers={'ETag': etag})
+
+    return None
+
+
+class VersionedCacheListMixin:
+    """Serve list responses from the per-user versioned cache"""
+
+    def list(self, request, *args, **kwargs):
+        """Return cached list data or build and cache it"""
+        key = response_cache_key(request)
+        etag = response_etag(request, key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers={'ETag': etag})
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TTL)
+            response['ETag'] = etag
+
+        return response
+
+    async def async_list(self, request, *args, **kwargs):
+        """Async version of list"""
+        key = await sync_to_async(response_cache_key)(request)
+        etag = response_etag(request, key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        data = await cache.aget(key)
+        if data is not None:
+            return Response(data, headers={'ETag': etag})
+
+        response = await super().async_list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, settings.RESPONSE_CACHE_TTL)
+            response['ETag'] = etag
+
+        return response
+
+
+class ConditionalRetrieveMixin:
+    """Answer detail requests with 304 while the user's data is unchanged"""
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return 304 for a matching ETag or the tagged detail response"""
+        etag = response_etag(request, response_cache_key(request))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+
+        return response
+
+    async def async_retrieve(self, request, *args, **kwargs):
+        """Async version of retrieve"""
+        key = await sync_to_async(response_cache_key)(request)
+        etag = response_etag(request, key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        response = await super().async_retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+
+        return response
@@ -0,0 +1,158 @@
+""" Resized recipe image variants with a size bounded disk cache"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+VARIANT_DIR = 'variants'
+VARIANT_SHARDS = 64
+UPLOAD_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+
+
+def variant_path(image_path, width, image_format):
+    """Return where the variant of an original image is stored
+
+    Variants are spread over VARIANT_SHARDS directories by original, so
+    eviction only scans the shard of the variant it just wrote.
+    """
+    directory, filename = os.path.split(image_path)
+    stem = os.path.splitext(filename)[0]
+    shard = int(hashlib.md5(stem.encode()).hexdigest(), 16) % VARIANT_SHARDS
+
+    return os.path.join(directory, VARIANT_DIR, f'{shard:02x}',
+                        f'{stem}_{width}.{image_format}')
+
+
+def _load_original(image_path):
+    """Return the decoded original, or raise ValueError if unreadable"""
+    try:
+        with Image.open(image_path) as img:
+            img.load()
+            return ImageOps.exif_transpose(img)
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError('The recipe image cannot be read.')
+
+
+def _render_variant(image_path, path, width, image_format):
+    """Resize the original to width and write it atomically to path
+
+    Returns the written file opened for reading, which stays readable
+    when another worker evicts the path.
+    """
+    img = _load_original(image_path)
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+    if image_format == 'jpeg' and img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            img.save(tmp_file, format=image_format.upper(),
+                     quality=settings.IMAGE_VARIANT_QUALITY)
+        variant = open(tmp_path, 'rb')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return variant
+
+
+def evict_variants(directory, max_bytes, keep=None):
+    """Delete least recently used variants until under max_bytes"""
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if (entry.is_file() and entry.path != keep
+                    and not entry.name.startswith('.')):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    if keep is not None:
+        total += os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def open_variant(image_path, width, image_format):
+    """Return a variant opened for reading, generating it on first request
+
+    Raises ValueError when the original is missing or cannot be decoded.
+    """
+    path = variant_path(image_path, width, image_format)
+    try:
+        variant = open(path, 'rb')
+        os.utime(variant.fileno())
+        return variant
+    except FileNotFoundError:
+        pass
+
+    variant = _render_variant(image_path, path, width, image_format)
+    try:
+        evict_variants(os.path.dirname(path),
+                       settings.IMAGE_VARIANT_CACHE_MAX_BYTES
+                       // VARIANT_SHARDS, keep=path)
+    except FileNotFoundError:
+        # Another worker evicted the new variant, the open file remains
+        pass
+
+    return variant
+
+
+def normalize_upload(upload):
+    """Return an upload re-encoded with orientation applied and no metadata
+
+    The header is checked for format and pixel count before any pixel
+    data is decoded. Images with transparency are stored as PNG, all
+    others as JPEG, and both are capped at the configured dimension.
+    """
+    upload.seek(0)
+    try:
+        img = Image.open(upload)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise ValueError('Upload a valid image.')
+    if img.format not in UPLOAD_FORMATS:
+        raise ValueError(f'Unsupported image format {img.format}.')
+    if img.width * img.height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValueError('Image dimensions are too large.')
+
+    with img:
+        img = ImageOps.exif_transpose(img)
+        max_size = settings.IMAGE_UPLOAD_MAX_DIMENSION
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        has_alpha = img.mode in ('RGBA', 'LA') or (
+            img.mode == 'P' and 'transparency' in img.info)
+        if has_alpha:
+            image_format, extension = 'PNG', 'png'
+            img = img.convert('RGBA')
+        else:
+            image_format, extension = 'JPEG', 'jpg'
+            img = img.convert('RGB')
+
+        normalized = TemporaryUploadedFile(
+            f'image.{extension}', CONTENT_TYPES[image_format.lower()],
+            0, None)
+        img.save(normalized, format=image_format, optimize=True,
+                 quality=settings.IMAGE_UPLOAD_QUALITY, progressive=True)
+
+    normalized.size = normalized.tell()
+    normalized.seek(0)
+    return normalized
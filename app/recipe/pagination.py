@@ -0,0 +1,17 @@
+""" Pagination for Recipe API"""
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over recipe ids, newest first"""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        """Order full text search results by relevance"""
+        if request.query_params.get('search'):
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
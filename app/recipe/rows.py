@@ -0,0 +1,165 @@
+""" Read-only Recipe API responses built from values() rows"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import models
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+RELATED_FIELDS = ('tags', 'ingredients')
+
+
+def related_rows(model, field, ids):
+    """Return (id, related id, name) rows of an M2M field, by related id"""
+    relation = model._meta.get_field(field)
+    target = relation.m2m_reverse_field_name()
+
+    return relation.remote_field.through.objects.filter(
+        **{f'{relation.m2m_field_name()}_id__in': ids}
+    ).order_by(f'{target}_id').values_list(
+        f'{relation.m2m_field_name()}_id', f'{target}_id', f'{target}__name')
+
+
+def group_related(rows):
+    """Map ids to the nested {'id', 'name'} data of their related rows"""
+    grouped = {}
+    for obj_id, related_id, name in rows:
+        grouped.setdefault(obj_id, []).append(
+            {'id': related_id, 'name': name})
+
+    return grouped
+
+
+def format_decimal(value):
+    """Format a Decimal like the DRF DecimalField"""
+    if value is None or not api_settings.COERCE_DECIMAL_TO_STRING:
+        return value
+
+    return f'{value:f}'
+
+
+class RowReadMixin:
+    """Serve list and retrieve from values() rows instead of serializers
+
+    The data matches the action's serializer class field for field, with
+    nested tags and ingredients loaded by one query each, ordered by id.
+    Only the columns and relations of get_response_fields are loaded.
+    """
+
+    def get_response_fields(self):
+        """Return the serializer fields to render"""
+        return self.get_serializer_class().Meta.fields
+
+    def get_rows_queryset(self):
+        """Return the action's queryset as rows of the response columns"""
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = [field for field in self.get_response_fields()
+                   if field not in RELATED_FIELDS]
+        # Annotations such as the search rank order the cursor pagination
+        return queryset.values(*dict.fromkeys(
+            ['id', *columns, *queryset.query.annotations]))
+
+    def _row_lookup(self):
+        """Return the lookup of the detail action"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def _file_url(self, storage, name):
+        """Represent a stored file like the DRF FileField"""
+        if not name:
+            return None
+        if not api_settings.UPLOADED_FILES_USE_URL:
+            return name
+
+        return self.request.build_absolute_uri(storage.url(name))
+
+    def _formatters(self, fields):
+        """Return the conversion of row values per serializer field"""
+        formatters = {}
+        for field in fields:
+            if field in RELATED_FIELDS:
+                continue
+            model_field = self.queryset.model._meta.get_field(field)
+            if isinstance(model_field, models.DecimalField):
+                formatters[field] = format_decimal
+            elif isinstance(model_field, models.FileField):
+                formatters[field] = partial(self._file_url,
+                                            model_field.storage)
+
+        return formatters
+
+    def build_data(self, rows, related, fields):
+        """Build the serializer's data from rows and grouped relations"""
+        formatters = self._formatters(fields)
+        data = []
+        for row in rows:
+            item = {}
+            for field in fields:
+                if field in related:
+                    item[field] = related[field].get(row['id'], [])
+                elif field in formatters:
+                    item[field] = formatters[field](row[field])
+                else:
+                    item[field] = row[field]
+            data.append(item)
+
+        return data
+
+    def represent(self, rows):
+        """Return the data of rows with their nested relations"""
+        fields = self.get_response_fields()
+        ids = [row['id'] for row in rows]
+        related = {
+            field: group_related(
+                related_rows(self.queryset.model, field, ids) if ids else [])
+            for field in fields if field in RELATED_FIELDS
+        }
+
+        return self.build_data(rows, related, fields)
+
+    async def arepresent(self, rows):
+        """Async version of represent"""
+        fields = self.get_response_fields()
+        ids = [row['id'] for row in rows]
+        related = {}
+        for field in fields:
+            if field in RELATED_FIELDS:
+                related[field] = group_related(
+                    [row async for row in related_rows(
+                        self.queryset.model, field, ids)] if ids else [])
+
+        return self.build_data(rows, related, fields)
+
+    def list(self, request, *args, **kwargs):
+        """List rows, paginated when the view has a paginator"""
+        queryset = self.get_rows_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.represent(page))
+
+        return Response(self.represent(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve one row"""
+        row = get_object_or_404(self.get_rows_queryset(), **self._row_lookup())
+        self.check_object_permissions(request, row)
+
+        return Response(self.represent([row])[0])
+
+    async def async_list(self, request, *args, **kwargs):
+        """Async version of list"""
+        queryset = self.get_rows_queryset()
+        if self.paginator is not None:
+            # DRF paginators slice and evaluate the queryset themselves
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            return self.get_paginated_response(await self.arepresent(page))
+
+        rows = [row async for row in queryset]
+        return Response(await self.arepresent(rows))
+
+    async def async_retrieve(self, request, *args, **kwargs):
+        """Async version of retrieve"""
+        row = await self.async_get_object(self.get_rows_queryset())
+
+        return Response((await self.arepresent([row]))[0])
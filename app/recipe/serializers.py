@@ -1,10 +1,105 @@
 """ Serializers for Recipe API"""
+from django.db import transaction
 from rest_framework import serializers
 
 from core.models import Recipe, Tag, Ingredient
-
-
-class IngredientSerializer(serializers.ModelSerializer):
+from recipe import images
+from recipe.cache import bump_version
+
+
+def resolve_by_name(model, user, names):
+    """Return user's objects for the given names, creating missing ones"""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    objs = list(model.objects.filter(user=user, name__in=names))
+    existing = {obj.name for obj in objs}
+    missing = [name for name in names if name not in existing]
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        objs.extend(model.objects.filter(user=user, name__in=missing))
+
+    return objs
+
+
+def _link_by_name(through, column, recipes, items_per_recipe, objs):
+    """Insert through rows linking recipes to objects by name"""
+    ids_by_name = {obj.name: obj.id for obj in objs}
+    rows = {
+        (recipe.id, ids_by_name[item['name']])
+        for recipe, items in zip(recipes, items_per_recipe)
+        for item in items
+    }
+    through.objects.bulk_create(
+        [through(recipe_id=recipe_id, **{column: obj_id})
+         for recipe_id, obj_id in rows],
+        ignore_conflicts=True,
+    )
+
+
+def bulk_create_recipes(user, items):
+    """Create validated recipes with nested tags/ingredients in bulk"""
+    items = [dict(item) for item in items]
+    tags = [item.pop('tags', []) for item in items]
+    ingredients = [item.pop('ingredients', []) for item in items]
+
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(user=user, **item) for item in items])
+        tag_objs = resolve_by_name(
+            Tag, user, [tag['name'] for group in tags for tag in group])
+        ingredient_objs = resolve_by_name(
+            Ingredient, user,
+            [ingredient['name'] for group in ingredients
+             for ingredient in group])
+        _link_by_name(Recipe.tags.through, 'tag_id',
+                      recipes, tags, tag_objs)
+        _link_by_name(Recipe.ingredients.through, 'ingredient_id',
+                      recipes, ingredients, ingredient_objs)
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes]).update_search_vector()
+
+    bump_version(user.pk)
+    return recipes
+
+
+class SparseModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer rendering only the fields given on creation"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserNameSerializer(SparseModelSerializer):
+    """Serializer for a model with a name unique per user"""
+
+    def validate_name(self, value):
+        """Reject renaming to a name the user already has"""
+        # Nested in a recipe, names resolve to the user's existing objects
+        if self.parent is not None:
+            return value
+
+        model = self.Meta.model
+        others = model.objects.filter(user=self.context['request'].user,
+                                      name=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f'{model._meta.verbose_name.capitalize()} with this name '
+                'already exists.')
+
+        return value
+
+
+class IngredientSerializer(UserNameSerializer):
     """Serializer for Ingredient"""
 
     class Meta:
@@ -13,7 +108,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UserNameSerializer):
     """Serializer for tag"""
 
     class Meta:
@@ -22,7 +117,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseModelSerializer):
     """Serializer for recipe"""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -33,23 +128,21 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'tags', 'ingredients',]
         read_only_fields = ['id']
 
+    def _resolve_by_name(self, model, items):
+        """Return user's objects for the given names, creating missing ones"""
+        return resolve_by_name(model, self.context['request'].user,
+                               [item['name'] for item in items])
+
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags"""
-        auth_user = self.context['request'].user
-
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag)
-            recipe.tags.add(tag_obj)
+        recipe.tags.add(*self._resolve_by_name(Tag, tags))
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients"""
-        auth_user = self.context['request'].user
-
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient)
-            recipe.ingredients.add(ingredient_obj)
+        recipe.ingredients.add(
+            *self._resolve_by_name(Ingredient, ingredients))
 
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe"""
         tags = validated_data.pop('tags', [])
@@ -60,23 +153,25 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update recipe"""
-        tags = validated_data.pop('tags', [])
-        ingredients = validated_data.pop('ingredients', [])
+        """Update recipe, saving only the fields that changed"""
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags=tags, recipe=instance)
+            instance.tags.set(self._resolve_by_name(Tag, tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients=ingredients,
-                                            recipe=instance)
+            instance.ingredients.set(
+                self._resolve_by_name(Ingredient, ingredients))
 
-        for field, value in validated_data.items():
-            setattr(instance, field, value)
+        changed = [field for field, value in validated_data.items()
+                   if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
 
-        instance.save()
+        if changed:
+            instance.save(update_fields=changed)
         return instance
 
 
@@ -95,3 +190,10 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def validate_image(self, value):
+        """Normalize the uploaded image before it is stored"""
+        try:
+            return images.normalize_upload(value)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
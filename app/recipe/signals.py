@@ -0,0 +1,38 @@
+""" Signal handlers invalidating the Recipe API cache"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+
+
+def bump_version_on_commit(user_id):
+    """Bump the cache version once the current transaction commits
+
+    A read between an earlier bump and the commit would cache the old
+    rows under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_cache(sender, instance, origin=None, **kwargs):
+    """Bump the owner's cache version when a row changes"""
+    # Deleting users cascades to their rows; their cache goes unused
+    if getattr(origin, 'model', type(origin)) is not get_user_model():
+        bump_version_on_commit(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_relation_cache(sender, instance, action, **kwargs):
+    """Bump the owner's cache version when recipe relations change"""
+    if action.startswith('post_'):
+        bump_version_on_commit(instance.user_id)
@@ -0,0 +1,65 @@
+""" Sparse fieldsets for Recipe API read responses"""
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from rest_framework.exceptions import ValidationError
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return'
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out'
+    ),
+]
+
+
+class SparseFieldsMixin:
+    """Select the fields of read responses with ?fields= and ?omit=
+
+    Serializers receive the selected fields, and querysets passed through
+    only_response_fields load only their columns.
+    """
+
+    sparse_actions = ('list', 'retrieve')
+
+    def get_response_fields(self):
+        """Return the serializer fields to render, in serializer order"""
+        fields = list(self.get_serializer_class().Meta.fields)
+        if self.action not in self.sparse_actions:
+            return fields
+
+        for param in ('fields', 'omit'):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            names = {name.strip() for name in value.split(',')} - {''}
+            unknown = names.difference(fields)
+            if unknown:
+                raise ValidationError({param: [
+                    f'Unknown fields: {", ".join(sorted(unknown))}.']})
+            fields = [field for field in fields
+                      if (field in names) == (param == 'fields')]
+
+        return fields
+
+    def only_response_fields(self, queryset):
+        """Load only the model columns the response fields need"""
+        if self.action not in self.sparse_actions:
+            return queryset
+
+        opts = queryset.model._meta
+        columns = [
+            field.name for field in opts.concrete_fields
+            if field.name in self.get_response_fields()
+        ]
+        return queryset.only(opts.pk.name, *columns)
+
+    def get_serializer(self, *args, **kwargs):
+        """Pass the selected fields to the serializer"""
+        if self.action in self.sparse_actions:
+            kwargs.setdefault('fields', self.get_response_fields())
+
+        return super().get_serializer(*args, **kwargs)
@@ -75,6 +75,32 @@ class PrivateIngredientsApiTests(TestCase):
         self.assertEqual(res.data[0]['name'], ingredient.name)
         self.assertEqual(res.data[0]['id'], ingredient.id)
 
+    def test_ingredient_list_not_modified(self):
+        """Test an ingredient list poll with a current ETag returns 304"""
+        Ingredient.objects.create(user=self.user, name='Salt')
+        etag = self.client.get(INGREDIENTS_URL)['ETag']
+
+        res = self.client.get(INGREDIENTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(user=self.user, name='Pepper')
+        res = self.client.get(INGREDIENTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_autocomplete_ingredients_by_user(self):
+        """Test prefix lookup only matches the user's ingredients"""
+        other_user = create_user(email='other@example.com',
+                                 password='password123')
+        Ingredient.objects.create(user=other_user, name='Salmon')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'SAL'})
+
+        self.assertEqual(res.data, [{'id': salt.id, 'name': 'Salt'}])
+
     def test_update_ingredient(self):
         """Test updating a ingredient"""
         ingredient = Ingredient.objects.create(user=self.user,
@@ -88,6 +114,24 @@ class PrivateIngredientsApiTests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_rename_ingredient_to_existing_name(self):
+        """Test renaming a ingredient to a name the user has is rejected"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Lemon')
+        Ingredient.objects.create(user=self.user, name='Tomato')
+        other_user = create_user(email='other@example.com')
+        Ingredient.objects.create(user=other_user, name='Brunch')
+        url = detail_url(ingredient_id=ingredient.id)
+
+        for method in (self.client.patch, self.client.put):
+            res = method(url, {'name': 'Tomato'})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('name', res.data)
+
+        res = self.client.patch(url, {'name': 'Lemon'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.patch(url, {'name': 'Brunch'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_ingredient(self):
         """Test for deleting a Ingredient"""
 
@@ -2,14 +2,20 @@
 Recipe API Tests
 """
 from decimal import Decimal
+from unittest.mock import patch
 
+import json
 import tempfile
 import os
+from io import BytesIO
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -17,9 +23,15 @@ from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
 
+from recipe import images
+from recipe.cache import get_version
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import (RecipeSerializer, RecipeDetailSerializer)
+from recipe.views import RecipeViewSet
 
 RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
 
 
 def detail_url(recipe_id):
@@ -32,6 +44,11 @@ def image_upload_url(recipe_id):
     return reverse('recipe:recipe-upload-image', args=[recipe_id])
 
 
+def image_variant_url(recipe_id):
+    """Create image variant url"""
+    return reverse('recipe:recipe-image-variant', args=[recipe_id])
+
+
 def create_recipe(user, **params):
     """Create sample recipe"""
 
@@ -84,7 +101,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_by_user(self):
         """Test recipe list by user"""
@@ -100,7 +117,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         recipe = create_recipe(user=self.user)
@@ -249,6 +266,75 @@ class PrivateRecipeAPITests(TestCase):
                                         user=self.user).exists()
             self.assertTrue(exists)
 
+    def test_create_recipe_with_tags_bulk(self):
+        """Test creating recipe tags does not query per tag"""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': Decimal('8.00'),
+            'tags': [{'name': f'Tag {i}'} for i in range(10)],
+        }
+
+        # Including a savepoint pair and one search vector update
+        with self.assertNumQueries(11), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 10)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 10)
+
+    def _search_vector_updates(self, method, url, payload):
+        """Return the search vector updates run by a committed request"""
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            res = method(url, payload, format='json')
+
+        self.assertIn(res.status_code,
+                      [status.HTTP_200_OK, status.HTTP_201_CREATED])
+        return [query for query in queries.captured_queries
+                if '"search_vector" =' in query['sql']]
+
+    def test_search_vector_updated_once_per_write(self):
+        """Test a write recomputes the search vector at most once"""
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': Decimal('8.00'),
+            'tags': [{'name': 'Dinner'}],
+            'ingredients': [{'name': 'Beef'}],
+        }
+        updates = self._search_vector_updates(
+            self.client.post, RECIPES_URL, payload)
+        self.assertEqual(len(updates), 1)
+        url = detail_url(Recipe.objects.get().id)
+
+        payload['tags'] = [{'name': 'Lunch'}]
+        updates = self._search_vector_updates(self.client.put, url, payload)
+        self.assertEqual(len(updates), 1)
+
+        updates = self._search_vector_updates(
+            self.client.patch, url, {'price': '9.00', 'title': 'Stew'})
+        self.assertEqual(updates, [])
+        self.assertEqual(Recipe.objects.get().price, Decimal('9.00'))
+
+    def test_create_recipe_with_duplicate_tag_names(self):
+        """Test repeated tag names in a payload create a single tag"""
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': Decimal('8.00'),
+            'tags': [{'name': 'Dinner'}, {'name': 'Dinner'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+
     def test_create_tag_on_update(self):
         """Test creating tag when updating a recipe"""
         recipe = create_recipe(user=self.user)
@@ -275,6 +361,39 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_breakfast, recipe.tags.all())
 
+    def test_partial_update_keeps_tags(self):
+        """Test updating other fields leaves tags untouched"""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+
+        payload = {'title': 'New recipe title'}
+        res = self.client.patch(detail_url(recipe.id), payload,
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(recipe.tags.all()), [tag])
+
+    def test_update_tags_only_changes_diff(self):
+        """Test updating tags keeps through rows that did not change"""
+        tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        tag_lunch = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_breakfast, tag_lunch)
+        through = Recipe.tags.through
+        kept_row = through.objects.get(recipe=recipe, tag=tag_breakfast)
+
+        payload = {'tags': [{'name': 'Breakfast'}, {'name': 'Dinner'}]}
+        res = self.client.patch(detail_url(recipe.id), payload,
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(through.objects.filter(id=kept_row.id).exists())
+        self.assertEqual(
+            set(recipe.tags.values_list('name', flat=True)),
+            {'Breakfast', 'Dinner'},
+        )
+
     def test_clear_recipe_tags(self):
         """Test for clearing tags for recipe"""
         tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
@@ -388,9 +507,9 @@ class PrivateRecipeAPITests(TestCase):
         serializer_2 = RecipeSerializer(recipe_2)
         serializer_3 = RecipeSerializer(recipe_3)
 
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test filtering by ingredient(s)"""
@@ -409,9 +528,403 @@ class PrivateRecipeAPITests(TestCase):
         serializer_2 = RecipeSerializer(recipe_2)
         serializer_3 = RecipeSerializer(recipe_3)
 
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data['results'])
+        self.assertIn(serializer_2.data, res.data['results'])
+        self.assertNotIn(serializer_3.data, res.data['results'])
+
+    def test_list_recipes_paginated(self):
+        """Test recipe list is paginated by cursor"""
+        recipes = [create_recipe(user=self.user, title=f'Recipe {i}')
+                   for i in range(3)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipes[2].id, recipes[1].id])
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipes[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_list_recipes_page_size_capped(self):
+        """Test requested page size is capped"""
+        for i in range(3):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPES_URL, {'page_size': 50})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_list_recipes_cached(self):
+        """Test a repeated list request is served from the cache"""
+        create_recipe(user=self.user)
+        res_1 = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            res_2 = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res_1.data, res_2.data)
+
+    def test_list_recipes_cache_invalidated_on_write(self):
+        """Test changes to recipes and their tags refresh the list"""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(user=self.user, name='Dinner')
+            recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'][0]['tags'],
+                         [{'id': tag.id, 'name': tag.name}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'], [])
+
+    def _delete_owner(self, count, bulk):
+        """Delete a user owning count recipes, tags and ingredients"""
+        user = create_user(email=f'owner-{bulk}-{count}@example.com',
+                           password='password123')
+        for i in range(count):
+            recipe = create_recipe(user=user, title=f'Recipe {i}')
+            recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {i}'))
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=user, name=f'Ingredient {i}'))
+
+        with patch('recipe.signals.bump_version_on_commit') as bump, \
+                CaptureQueriesContext(connection) as queries:
+            if bulk:
+                get_user_model().objects.filter(pk=user.pk).delete()
+            else:
+                user.delete()
+
+        return bump.call_count, len(queries)
+
+    def test_delete_user_signal_work_bounded(self):
+        """Test deleting users does no per-row cache or search work"""
+        for bulk in (False, True):
+            bumps_small, queries_small = self._delete_owner(2, bulk)
+            bumps_large, queries_large = self._delete_owner(10, bulk)
+
+            self.assertEqual(bumps_small, 0)
+            self.assertEqual(bumps_large, 0)
+            self.assertEqual(queries_small, queries_large)
+
+    def test_list_recipes_not_modified(self):
+        """Test a list poll with a current ETag returns 304"""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_retrieve_recipe_not_modified(self):
+        """Test a detail poll with a current ETag returns 304"""
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'title': 'New title'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_export_recipes(self):
+        """Test exporting recipes as newline delimited JSON"""
+        other_user = create_user(email='other@example.com',
+                                 password='password123')
+        create_recipe(user=other_user)
+        recipes = [self._create_recipe_with_relations(i) for i in range(3)]
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2):
+            res = self.client.get(EXPORT_URL)
+            lines = b''.join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        exported = [json.loads(line) for line in lines]
+        expected = [
+            json.loads(json.dumps(RecipeDetailSerializer(recipe).data))
+            for recipe in reversed(recipes)
+        ]
+        self.assertEqual(exported, expected)
+
+    def _create_recipe_with_relations(self, index):
+        """Create a recipe with its own tag and ingredient"""
+        recipe = create_recipe(user=self.user, title=f'Recipe {index}')
+        recipe.tags.add(Tag.objects.create(user=self.user,
+                                           name=f'Tag {index}'))
+        recipe.ingredients.add(Ingredient.objects.create(
+            user=self.user, name=f'Ingredient {index}'))
+        return recipe
+
+    def test_list_recipes_constant_queries(self):
+        """Test listing recipes does not query per recipe"""
+        for i in range(5):
+            self._create_recipe_with_relations(i)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+        self.assertEqual(len(res.data['results'][0]['tags']), 1)
+        self.assertEqual(len(res.data['results'][0]['ingredients']), 1)
+
+    def test_retrieve_recipe_constant_queries(self):
+        """Test retrieving a recipe prefetches tags and ingredients"""
+        recipe = self._create_recipe_with_relations(1)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, RecipeDetailSerializer(recipe).data)
+
+    def test_filter_by_tags_match_all(self):
+        """Test filtering recipes having every requested tag"""
+        tag_1 = Tag.objects.create(user=self.user, name='Dinner')
+        tag_2 = Tag.objects.create(user=self.user, name='Vegan')
+        recipe_1 = create_recipe(user=self.user, title='Curry')
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_2 = create_recipe(user=self.user, title='Steak')
+        recipe_2.tags.add(tag_1)
+
+        params = {'tags': f'{tag_1.id},{tag_2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe_1.id])
+
+    def test_filter_by_ingredients_match_all(self):
+        """Test filtering recipes having every requested ingredient"""
+        lemon = Ingredient.objects.create(user=self.user, name='Lemon')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe_1 = create_recipe(user=self.user, title='Fish')
+        recipe_1.ingredients.add(lemon, salt)
+        recipe_2 = create_recipe(user=self.user, title='Lemonade')
+        recipe_2.ingredients.add(lemon)
+
+        params = {'ingredients': f'{lemon.id},{salt.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe_1.id])
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test a recipe matching several tags is listed once"""
+        tag_1 = Tag.objects.create(user=self.user, name='Dinner')
+        tag_2 = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_1, tag_2)
+
+        params = {'tags': f'{tag_1.id},{tag_2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe.id])
+
+    def test_search_recipes(self):
+        """Test searching title, description, tags and ingredients"""
+        with self.captureOnCommitCallbacks(execute=True):
+            soup = create_recipe(user=self.user, title='Tomato soup',
+                                 description='Warm')
+            salad = create_recipe(user=self.user, title='Salad',
+                                  description='Fresh tomato slices')
+            pasta = create_recipe(user=self.user, title='Pasta',
+                                  description='Quick')
+            pasta.ingredients.add(
+                Ingredient.objects.create(user=self.user, name='Tomatoes'))
+            create_recipe(user=self.user, title='Cake', description='Sweet')
+            create_recipe(user=create_user(email='other@example.com',
+                                           password='password123'),
+                          title='Tomato pie')
+
+        res = self.client.get(RECIPES_URL, {'search': 'tomato'})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [soup.id, pasta.id, salad.id])
+
+    def test_search_combines_with_filters(self):
+        """Test search results are narrowed by tag filters"""
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(user=self.user, name='Dinner')
+            dinner = create_recipe(user=self.user, title='Tomato soup')
+            dinner.tags.add(tag)
+            create_recipe(user=self.user, title='Tomato salad')
+
+        res = self.client.get(RECIPES_URL,
+                              {'search': 'tomato', 'tags': tag.id})
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [dinner.id])
+
+    def test_search_paginates(self):
+        """Test search results page by relevance with a cursor"""
+        with self.captureOnCommitCallbacks(execute=True):
+            strong = create_recipe(user=self.user, title='Tomato')
+            weak = [create_recipe(user=self.user, title=f'Dish {i}',
+                                  description='with tomato')
+                    for i in range(3)]
+
+        res = self.client.get(RECIPES_URL,
+                              {'search': 'tomato', 'page_size': 2})
+        ids = [item['id'] for item in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [item['id'] for item in res.data['results']]
+
+        self.assertEqual(ids, [strong.id] + [r.id for r in reversed(weak)])
+        self.assertIsNone(res.data['next'])
+
+    def test_search_vector_follows_tag_rename(self):
+        """Test renaming a tag updates search results"""
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        recipe = create_recipe(user=self.user, title='Curry')
+        recipe.tags.add(tag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Vegan'
+            tag.save()
+        res = self.client.get(RECIPES_URL, {'search': 'vegan'})
+        self.assertEqual([item['id'] for item in res.data['results']],
+                         [recipe.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+        res = self.client.get(RECIPES_URL, {'search': 'vegan'})
+        self.assertEqual(res.data['results'], [])
+
+
+class CacheVersionCommitTests(TransactionTestCase):
+    """Test cache versions are bumped only once writes commit"""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.recipe = create_recipe(user=self.user)
+
+    def _add_tag(self):
+        """Tag the recipe"""
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Tag'))
+
+    def test_version_bumped_after_commit(self):
+        """Test a read inside the writing transaction sees no bump"""
+        for write in (self._add_tag, self.recipe.delete):
+            version = get_version(self.user.pk)
+
+            with transaction.atomic():
+                write()
+                self.assertEqual(get_version(self.user.pk), version)
+
+            self.assertNotEqual(get_version(self.user.pk), version)
+
+    def test_version_kept_on_rollback(self):
+        """Test a rolled back write does not bump the version"""
+        version = get_version(self.user.pk)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._add_tag()
+            raise RuntimeError
+
+        self.assertEqual(get_version(self.user.pk), version)
+
+
+class BulkCreateRecipeTests(TestCase):
+    """Tests for the bulk recipe creation endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, prefix=''):
+        """Build a list of recipe payloads sharing tags and ingredients"""
+        return [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '2.50',
+                'tags': [{'name': f'{prefix}Dinner'},
+                         {'name': f'{prefix}Tag {i}'}],
+                'ingredients': [{'name': f'{prefix}Salt'}],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create_recipes(self):
+        """Test creating several recipes with nested relations"""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.post(BULK_CREATE_URL, self._payload(3),
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['results']), 3)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(),
+                         1)
+        for result in res.data['results']:
+            recipe = recipes.get(id=result['data']['id'])
+            self.assertEqual(result['data']['title'], recipe.title)
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_create_constant_queries(self):
+        """Test the number of queries does not grow with the batch"""
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_CREATE_URL, self._payload(2, 'a'),
+                             format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_CREATE_URL, self._payload(20, 'b'),
+                             format='json')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported and valid ones created"""
+        payload = self._payload(2)
+        payload[1]['time_minutes'] = 'soon'
+
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        created, failed = res.data['results']
+        self.assertEqual(created['status'], status.HTTP_201_CREATED)
+        self.assertEqual(failed['status'], status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minutes', failed['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_requires_list(self):
+        """Test a non-list payload is rejected"""
+        res = self.client.post(BULK_CREATE_URL, self._payload(1)[0],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
 
 
 class ImageUploadTests(TestCase):
@@ -441,6 +954,49 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def _upload(self, img, image_format='JPEG', **save_kwargs):
+        """Upload a Pillow image to the recipe"""
+        url = image_upload_url(self.recipe.id)
+        suffix = f'.{image_format.lower()}'
+        with tempfile.NamedTemporaryFile(suffix=suffix) as image_file:
+            img.save(image_file, format=image_format, **save_kwargs)
+            image_file.seek(0)
+            return self.client.post(url, {'image': image_file},
+                                    format='multipart')
+
+    def test_upload_image_normalized(self):
+        """Test uploads are oriented, capped in size and stripped"""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera maker'
+
+        with override_settings(IMAGE_UPLOAD_MAX_DIMENSION=100):
+            res = self._upload(Image.new('RGB', (400, 200)), exif=exif)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith('.jpg'))
+        with Image.open(self.recipe.image.path) as img:
+            self.assertEqual(img.size, (50, 100))
+            self.assertEqual(len(img.getexif()), 0)
+
+    def test_upload_transparent_image_kept_png(self):
+        """Test images with transparency are stored as PNG"""
+        res = self._upload(Image.new('RGBA', (10, 10)), image_format='PNG')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith('.png'))
+
+    def test_upload_image_too_many_pixels(self):
+        """Test images above the pixel limit are rejected"""
+        with override_settings(IMAGE_UPLOAD_MAX_PIXELS=50):
+            res = self._upload(Image.new('RGB', (10, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
     def test_upload_invalid_image(self):
         """Test for uploading invalid image"""
         url = image_upload_url(self.recipe.id)
@@ -448,3 +1004,113 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageVariantTests(TestCase):
+    """Tests for resized image variants."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300)).save(buffer, format='JPEG')
+        self.recipe.image.save('photo.jpg', ContentFile(buffer.getvalue()))
+
+    def tearDown(self):
+        self.recipe.image.delete()
+
+    def test_get_image_variant(self):
+        """Test a variant is resized and cached on disk"""
+        url = image_variant_url(self.recipe.id)
+        res = self.client.get(url, {'width': 200, 'image_format': 'webp'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/webp')
+        with Image.open(BytesIO(b''.join(res.streaming_content))) as img:
+            self.assertEqual(img.size, (200, 150))
+        path = images.variant_path(self.recipe.image.path, 200, 'webp')
+        self.assertTrue(os.path.exists(path))
+
+        with patch('recipe.images.Image.open') as patched_open:
+            res = self.client.get(url, {'width': 200, 'image_format': 'webp'})
+            b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_open.assert_not_called()
+
+    def test_image_variant_rejects_unlisted_width(self):
+        """Test widths outside the allowlist are rejected"""
+        url = image_variant_url(self.recipe.id)
+        res = self.client.get(url, {'width': 123})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_image_variant_rejects_non_ascii_digits(self):
+        """Test digit-like widths that int() rejects return 400"""
+        url = image_variant_url(self.recipe.id)
+
+        for width in ['²', '１００', '0100']:
+            res = self.client.get(url, {'width': width})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_image_variant_missing_or_corrupt_original(self):
+        """Test an unreadable original image returns 404"""
+        url = image_variant_url(self.recipe.id)
+        with open(self.recipe.image.path, 'wb') as original:
+            original.write(b'not an image')
+
+        res = self.client.get(url, {'width': 200})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        os.remove(self.recipe.image.path)
+        res = self.client.get(url, {'width': 100})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_variant_evicted_by_other_worker(self):
+        """Test a variant deleted right after rendering is still served"""
+        url = image_variant_url(self.recipe.id)
+
+        def evict(directory, max_bytes, keep=None):
+            os.remove(keep)
+            os.path.getsize(keep)
+
+        with patch('recipe.images.evict_variants', side_effect=evict):
+            res = self.client.get(url, {'width': 200})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with Image.open(BytesIO(b''.join(res.streaming_content))) as img:
+            self.assertEqual(img.size, (200, 150))
+
+    def test_image_variants_sharded_by_original(self):
+        """Test variants of one image share a shard directory"""
+        image_path = self.recipe.image.path
+        directories = {
+            os.path.dirname(images.variant_path(image_path, width, 'jpeg'))
+            for width in [100, 200, 400]
+        }
+
+        self.assertEqual(len(directories), 1)
+        self.assertEqual(os.path.dirname(directories.pop()),
+                         os.path.join(os.path.dirname(image_path),
+                                      images.VARIANT_DIR))
+
+    def test_evict_least_recently_used_variants(self):
+        """Test eviction removes the oldest variants first"""
+        directory = tempfile.mkdtemp()
+        paths = []
+        for i in range(3):
+            path = os.path.join(directory, f'{i}.jpeg')
+            with open(path, 'wb') as variant:
+                variant.write(b'x' * 10)
+            os.utime(path, (i, i))
+            paths.append(path)
+
+        images.evict_variants(directory, 25, keep=paths[0])
+
+        self.assertEqual([os.path.exists(path) for path in paths],
+                         [True, False, True])
@@ -0,0 +1,99 @@
+"""
+Tests for serving recipes from values() rows
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return a recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RowReadTests(TestCase):
+    """Test row responses are identical to serializer responses"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ['Vegan', 'Dinner', 'Quick']]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name)
+                       for name in ['Salt', 'Lentils']]
+        self.recipes = []
+        for index, price in enumerate(['5.00', '0.50', '123.45']):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Lentil soup {index}',
+                description='Warm "and" hearty été' * index,
+                time_minutes=10 + index, price=Decimal(price),
+                link='' if index else 'https://example.com/soup',
+                image=f'uploads/recipe/{index}.jpg' if index else None)
+            recipe.tags.add(*reversed(tags[:index + 1]))
+            recipe.ingredients.add(*ingredients[:index])
+            self.recipes.append(recipe)
+        Recipe.objects.update_search_vector()
+
+    def _queryset(self):
+        """Return the recipes with relations prefetched like the view"""
+        return RecipeViewSet()._optimize_queryset(
+            Recipe.objects.filter(user=self.user).order_by('-id'))
+
+    def _render(self, data):
+        """Render data like the JSON responses"""
+        return JSONRenderer().render(data)
+
+    def test_list_identical(self):
+        """Test list responses match RecipeSerializer byte for byte"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        serializer = RecipeSerializer(
+            self._queryset(), many=True,
+            context={'request': res.wsgi_request})
+        self.assertEqual(res.content, self._render({
+            'next': None, 'previous': None, 'results': serializer.data}))
+
+    def test_search_list_identical(self):
+        """Test search results match the serializer and omit the rank"""
+        res = self.client.get(RECIPES_URL, {'search': 'lentil'})
+
+        results = res.json()['results']
+        recipes = self._queryset().in_bulk()
+        serializer = RecipeSerializer(
+            [recipes[item['id']] for item in results], many=True,
+            context={'request': res.wsgi_request})
+        self.assertEqual(len(results), 3)
+        self.assertEqual(res.content, self._render({
+            'next': None, 'previous': None, 'results': serializer.data}))
+
+    def test_retrieve_identical(self):
+        """Test detail responses match RecipeDetailSerializer"""
+        for recipe in self._queryset():
+            res = self.client.get(detail_url(recipe.id))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            serializer = RecipeDetailSerializer(
+                recipe, context={'request': res.wsgi_request})
+            self.assertEqual(res.content, self._render(serializer.data))
+
+    def test_retrieve_invalid_id(self):
+        """Test a non numeric id is not found"""
+        res = self.client.get(detail_url('abc'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
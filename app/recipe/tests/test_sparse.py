@@ -0,0 +1,113 @@
+"""
+Tests for sparse fieldsets on the recipe API
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Return a recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test selecting response fields with fields and omit"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Lentil soup', time_minutes=20,
+            price=Decimal('4.50'), description='Warm')
+        self.recipe.tags.add(Tag.objects.create(user=self.user,
+                                                name='Dinner'))
+        self.recipe.ingredients.add(Ingredient.objects.create(
+            user=self.user, name='Lentils'))
+        Recipe.objects.update_search_vector()
+
+    def test_list_fields(self):
+        """Test a recipe card issues one query for three columns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL,
+                                  {'fields': 'price,id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'], [
+            {'id': self.recipe.id, 'title': 'Lentil soup', 'price': '4.50'},
+        ])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"time_minutes"', queries[0]['sql'])
+
+    def test_list_omit(self):
+        """Test omitted relations are not queried"""
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'omit': 'tags,ingredients'})
+
+        self.assertEqual(list(res.json()['results'][0]),
+                         ['id', 'title', 'time_minutes', 'price', 'link'])
+
+    def test_fields_and_omit(self):
+        """Test omit applies to the selected fields"""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,title,tags',
+                                            'omit': 'title'})
+
+        self.assertEqual(res.json()['results'], [
+            {'id': self.recipe.id,
+             'tags': [{'id': self.recipe.tags.get().id, 'name': 'Dinner'}]},
+        ])
+
+    def test_search_fields(self):
+        """Test search results can omit fields"""
+        res = self.client.get(RECIPES_URL,
+                              {'search': 'lentil', 'fields': 'title'})
+
+        self.assertEqual(res.json()['results'], [{'title': 'Lentil soup'}])
+
+    def test_retrieve_fields(self):
+        """Test detail responses accept sparse fields"""
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(self.recipe.id),
+                                  {'fields': 'description,ingredients'})
+
+        self.assertEqual(res.json(), {
+            'ingredients': [{'id': self.recipe.ingredients.get().id,
+                             'name': 'Lentils'}],
+            'description': 'Warm',
+        })
+
+    def test_unknown_field(self):
+        """Test unknown fields are rejected"""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', res.json()['fields'][0])
+
+    def test_tag_and_ingredient_fields(self):
+        """Test tags and ingredients accept sparse fields"""
+        for url, model in [(TAGS_URL, Tag), (INGREDIENTS_URL, Ingredient)]:
+            res = self.client.get(url, {'fields': 'id'})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), [{'id': model.objects.get().id}])
+
+    def test_autocomplete_omit(self):
+        """Test autocomplete matches accept sparse fields"""
+        res = self.client.get(TAGS_URL, {'q': 'din', 'omit': 'id'})
+
+        self.assertEqual(res.json(), [{'name': 'Dinner'}])
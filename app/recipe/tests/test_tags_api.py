@@ -75,6 +75,58 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.data[0]['name'], tag.name)
         self.assertEqual(res.data[0]['id'], tag.id)
 
+    def test_tag_list_cache_invalidated(self):
+        """Test the cached tag list reflects new and updated tags"""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        self.client.get(TAGS_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(tag.id), {'name': 'Snack'})
+            Tag.objects.create(user=self.user, name='Dinner')
+        res = self.client.get(TAGS_URL)
+
+        names = [item['name'] for item in res.data]
+        self.assertEqual(names, ['Snack', 'Dinner'])
+
+    def test_autocomplete_tags(self):
+        """Test prefix lookup ranked by usage and name length"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=5,
+                                       price=Decimal('1.00'))
+        Tag.objects.create(user=self.user, name='Dinner party')
+        Tag.objects.create(user=self.user, name='Dinner')
+        popular = Tag.objects.create(user=self.user, name='Dinner for two')
+        recipe.tags.add(popular)
+        Tag.objects.create(user=self.user, name='Lunch')
+
+        res = self.client.get(TAGS_URL, {'q': 'din'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Dinner for two', 'Dinner', 'Dinner party'])
+
+        res = self.client.get(TAGS_URL, {'q': 'din', 'limit': 1})
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Dinner for two'])
+
+    def test_autocomplete_ranks_all_matches(self):
+        """Test the most used match wins among many prefix matches"""
+        Tag.objects.bulk_create(
+            [Tag(user=self.user, name=f'Dinner {i:03}') for i in range(600)])
+        popular = Tag.objects.create(user=self.user, name='Dinner popular')
+        for title in ['Soup', 'Stew']:
+            recipe = Recipe.objects.create(user=self.user, title=title,
+                                           time_minutes=5,
+                                           price=Decimal('1.00'))
+            recipe.tags.add(popular)
+
+        for params in [{}, {'assigned_only': 1}]:
+            res = self.client.get(TAGS_URL, {'q': 'din', 'limit': 1,
+                                             **params})
+
+            self.assertEqual(res.data, [{'id': popular.id,
+                                         'name': 'Dinner popular'}])
+
     def test_update_tag(self):
         """Test updating a tag"""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -87,6 +139,24 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming a tag to a name the user has is rejected"""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Snack')
+        other_user = create_user(email='other@example.com')
+        Tag.objects.create(user=other_user, name='Brunch')
+        url = detail_url(tag_id=tag.id)
+
+        for method in (self.client.patch, self.client.put):
+            res = method(url, {'name': 'Snack'})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('name', res.data)
+
+        res = self.client.patch(url, {'name': 'Breakfast'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.patch(url, {'name': 'Brunch'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_tag(self):
         """Test for deleting a Tag"""
 
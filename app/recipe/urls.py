@@ -3,11 +3,13 @@ from django.urls import (
     path,
     include
 )
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import AsyncRouter
 from recipe import views
 
-router = DefaultRouter()
+router = AsyncRouter() if settings.ASYNC_VIEWS else DefaultRouter()
 router.register('recipes', views.RecipeViewSet)
 router.register('tags', views.TagViewSet)
 router.register('ingredient', views.IngredientViewSet)
@@ -1,14 +1,26 @@
 """ Views for Recipe API"""
 from drf_spectacular.utils import (extend_schema, extend_schema_view,
                                    OpenApiParameter, OpenApiTypes)
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F, FloatField, Prefetch
+from django.db.models.functions import Cast, Length
+from django.http import FileResponse, StreamingHttpResponse
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Recipe, Tag, Ingredient
-from recipe import serializers
+from core.async_views import AsyncViewMixin
+from core.authentication import CachedTokenAuthentication
+from core.db.router import ReplicaReadMixin
+from core.models import SEARCH_CONFIG, Recipe, Tag, Ingredient
+from core.renderers import ORJSONRenderer
+from recipe import images, serializers
+from recipe.cache import ConditionalRetrieveMixin, VersionedCacheListMixin
+from recipe.pagination import RecipeCursorPagination
+from recipe.rows import RowReadMixin
+from recipe.sparse import SPARSE_PARAMETERS, SparseFieldsMixin
 
 
 @extend_schema_view(list=extend_schema(
@@ -23,37 +35,95 @@ from recipe import serializers
             OpenApiTypes.STR,
             description='Comma separated list of ingredient IDs to filter'
         ),
-
+        OpenApiParameter(
+            'search',
+            OpenApiTypes.STR,
+            description='Full text search over title, description, tags '
+                        'and ingredients, ordered by relevance'
+        ),
+        OpenApiParameter(
+            'match',
+            OpenApiTypes.STR, enum=['any', 'all'],
+            description='Match recipes with any (default) or all of the '
+                        'given tags/ingredients'
+        ),
+        *SPARSE_PARAMETERS,
     ]
-))
-class RecipeViewSet(viewsets.ModelViewSet):
+), retrieve=extend_schema(parameters=SPARSE_PARAMETERS))
+class RecipeViewSet(ReplicaReadMixin,
+                    VersionedCacheListMixin,
+                    ConditionalRetrieveMixin,
+                    SparseFieldsMixin,
+                    RowReadMixin,
+                    AsyncViewMixin,
+                    viewsets.ModelViewSet):
     """View for managing recipe API"""
 
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Recipe.objects.defer('search_vector')
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    async_actions = ('list', 'retrieve')
+    bulk_max_size = 500
+    export_chunk_size = 500
 
     def _params_to_ints(self, qs):
         """Convert list of string to integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _optimize_queryset(self, queryset):
+        """Prefetch nested relations ordered by id, as RowReadMixin does"""
+        return queryset.prefetch_related(
+            Prefetch('tags',
+                     queryset=Tag.objects.only('id', 'name').order_by('id')),
+            Prefetch('ingredients',
+                     queryset=Ingredient.objects.only('id', 'name')
+                     .order_by('id')),
+        )
+
+    def _filter_by_related(self, queryset, through, column, ids, match_all):
+        """Filter recipes through an M2M table using a semi-join"""
+        matches = through.objects.filter(**{f'{column}__in': ids})
+        if match_all:
+            matches = matches.values('recipe_id').annotate(
+                matched=Count(column)
+            ).filter(matched=len(set(ids)))
+
+        return queryset.filter(id__in=matches.values('recipe_id'))
+
     def get_queryset(self):
         """Retrieve recipes for logged in user"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match_all = self.request.query_params.get('match') == 'all'
         queryset = self.queryset
+        if self.action == 'export':
+            queryset = self._optimize_queryset(queryset)
 
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_by_related(
+                queryset, Recipe.tags.through, 'tag_id', tag_ids, match_all)
 
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_by_related(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                ingredient_ids, match_all)
 
-        return queryset.filter(user=self.request.user
-                               ).order_by('-id').distinct()
+        search = self.request.query_params.get('search')
+        ordering = ['-id']
+        if search:
+            query = SearchQuery(search, search_type='websearch',
+                                config=SEARCH_CONFIG)
+            # ts_rank returns real; a double keeps cursor positions exact
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), query),
+                          FloatField()))
+            ordering = ['-rank', '-id']
+
+        return queryset.filter(user=self.request.user).order_by(*ordering)
 
     def get_serializer_class(self):
         "Return serializer class for request"
@@ -76,10 +146,100 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
+            serializer.validated_data['image'].close()
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(parameters=[
+        OpenApiParameter('width', OpenApiTypes.INT,
+                         enum=settings.IMAGE_VARIANT_WIDTHS, required=True),
+        OpenApiParameter('image_format', OpenApiTypes.STR,
+                         enum=settings.IMAGE_VARIANT_FORMATS),
+    ])
+    @action(methods=['GET'], detail=True, url_path='image')
+    def image_variant(self, request, pk=None):
+        """Return a resized variant of the recipe image"""
+        recipe = self.get_object()
+        width = request.query_params.get('width', '')
+        image_format = request.query_params.get('image_format', 'jpeg')
+        if (width not in {str(w) for w in settings.IMAGE_VARIANT_WIDTHS}
+                or image_format not in settings.IMAGE_VARIANT_FORMATS):
+            return Response(
+                {'detail': 'Unsupported width or format.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not recipe.image:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            variant = images.open_variant(recipe.image.path, int(width),
+                                          image_format)
+        except ValueError:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        return FileResponse(variant,
+                            content_type=images.CONTENT_TYPES[image_format])
+
+    @action(methods=['POST'], detail=False, url_path='bulk_create')
+    def bulk_create(self, request):
+        """Create a list of recipes in a single transaction"""
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a list of recipes.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_size:
+            return Response(
+                {'detail': f'At most {self.bulk_max_size} recipes allowed.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        items = [self.get_serializer(data=item) for item in request.data]
+        valid = [item for item in items if item.is_valid()]
+        recipes = serializers.bulk_create_recipes(
+            request.user, [item.validated_data for item in valid])
+        created = self._optimize_queryset(
+            Recipe.objects.filter(id__in=[recipe.id for recipe in recipes])
+        ).in_bulk()
+
+        results = []
+        recipe_ids = iter(recipe.id for recipe in recipes)
+        for item in items:
+            if item.errors:
+                results.append({'status': status.HTTP_400_BAD_REQUEST,
+                                'errors': item.errors})
+            else:
+                data = self.get_serializer(created[next(recipe_ids)]).data
+                results.append({'status': status.HTTP_201_CREATED,
+                                'data': data})
+
+        if not recipes and items:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(recipes) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response({'results': results}, status=response_status)
+
+    def _export_lines(self, queryset):
+        """Yield one JSON line per recipe, fetching in chunks"""
+        renderer = ORJSONRenderer()
+        for recipe in queryset.iterator(chunk_size=self.export_chunk_size):
+            data = self.get_serializer(recipe).data
+            yield renderer.render(data) + b'\n'
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream the user's recipes as newline delimited JSON"""
+        response = StreamingHttpResponse(
+            self._export_lines(self.get_queryset()),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"')
+
+        return response
+
 
 @extend_schema_view(list=extend_schema(
     parameters=[
@@ -88,28 +248,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
             OpenApiTypes.INT, enum=[0, 1],
             description='Filter by items assigned to recipe'
         ),
+        OpenApiParameter(
+            'q',
+            OpenApiTypes.STR,
+            description='Name prefix to autocomplete, returns the best '
+                        'matches ranked by usage'
+        ),
+        OpenApiParameter(
+            'limit',
+            OpenApiTypes.INT,
+            description='Maximum number of autocomplete matches'
+        ),
+        *SPARSE_PARAMETERS,
     ]
 ))
-class BaseRecipeFieldViewSet(mixins.DestroyModelMixin,
+class BaseRecipeFieldViewSet(ReplicaReadMixin,
+                             VersionedCacheListMixin,
+                             SparseFieldsMixin,
+                             AsyncViewMixin,
+                             mixins.DestroyModelMixin,
                              mixins.UpdateModelMixin,
                              mixins.ListModelMixin,
                              viewsets.GenericViewSet):
     """Base class for recipe fields"""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    async_actions = ('list',)
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    def _autocomplete(self, queryset, term):
+        """Return prefix matches ranked by usage, then by name length"""
+        try:
+            limit = min(int(self.request.query_params['limit']),
+                        self.autocomplete_max_limit)
+        except (KeyError, ValueError):
+            limit = self.autocomplete_limit
+        # Every prefix match is ranked; the join of assigned_only stays
+        # inside the subquery so it does not skew the usage counts
+        matches = queryset.filter(name__istartswith=term).values('id')
+
+        return self.queryset.filter(id__in=matches).annotate(
+            usage=Count('recipe'),
+            name_length=Length('name'),
+        ).order_by('-usage', 'name_length', 'name')[:max(limit, 0)]
 
     def get_queryset(self):
         """Filter ingredient to logged in user"""
         assigned_only = bool(
             int(self.request.query_params.get('assigned_only', 0))
         )
+        term = self.request.query_params.get('q')
         queryset = self.queryset
         if assigned_only:
             queryset = queryset.filter(recipe__isnull=False)
+        queryset = queryset.filter(user=self.request.user)
+
+        if term and self.action == 'list':
+            queryset = self._autocomplete(queryset, term)
+        else:
+            queryset = queryset.order_by('-name').distinct()
 
-        return queryset.filter(user=self.request.user
-                               ).order_by('-name').distinct()
+        return self.only_response_fields(queryset)
 
 
 class TagViewSet(BaseRecipeFieldViewSet):
@@ -1,13 +1,19 @@
 """
 URL mappings for the user API.
 """
+from django.conf import settings
 from django.urls import path
 from user import views
 
+if settings.ASYNC_VIEWS:
+    manage_user_view = views.ManageUserView.as_async_view()
+else:
+    manage_user_view = views.ManageUserView.as_view()
+
 app_name = 'user'
 
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
-    path('me/', views.ManageUserView.as_view(), name='me'),
+    path('me/', manage_user_view, name='me'),
 ]
@@ -1,9 +1,14 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext as _
+from rest_framework import exceptions, generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from core.async_views import AsyncViewMixin
+from core.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializers, AuthTokenSerializers
 
 
@@ -18,12 +23,29 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(AsyncViewMixin, generics.RetrieveUpdateAPIView):
     """Manage the authenticated user in the system."""
     serializer_class = UserSerializers
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    async_actions = ('get',)
 
     def get_object(self):
-        """Retrieve and return the authenticated user."""
-        return self.request.user
+        """Retrieve and return the authenticated user.
+
+        Writes reload the user so a cached copy is never saved back.
+        """
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+
+        user = get_user_model().objects.filter(
+            pk=self.request.user.pk, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        return user
+
+    async def async_get(self, request, *args, **kwargs):
+        """Return the authenticated user loaded during authentication."""
+        return Response(self.get_serializer(self.get_object()).data)
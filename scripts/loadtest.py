@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Load test a running recipe API and report latency per endpoint as JSON.
+
+Only the standard library is used, so it runs from any machine that can
+reach the stack, e.g. against docker-compose-deploy.yml on localhost:
+
+    python scripts/loadtest.py --base-url http://localhost \\
+        --stages 5:30,20:30,50:30 --output results.json
+    python scripts/loadtest.py --compare old.json results.json
+
+Each stage runs the given number of concurrent clients for the given
+number of seconds. Clients pick scenarios at random by weight.
+"""
+import argparse
+import http.client
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from urllib.parse import urlencode, urlsplit
+
+SCENARIOS = {
+    'login': 5,
+    'list': 40,
+    'list_filtered': 15,
+    'detail': 25,
+    'create': 10,
+    'upload_image': 5,
+}
+PASSWORD = 'loadtest-password'
+
+
+def make_png(size=64):
+    """Return a small valid PNG built with zlib only."""
+    def chunk(kind, data):
+        body = kind + data
+        return (struct.pack('>I', len(data)) + body
+                + struct.pack('>I', zlib.crc32(body) & 0xffffffff))
+
+    row = b'\x00' + bytes(random.randrange(256) for _ in range(size * 3))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0,
+                                         0, 0))
+            + chunk(b'IDAT', zlib.compress(row * size))
+            + chunk(b'IEND', b''))
+
+
+class Client:
+    """Keep-alive HTTP client for one simulated user."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection_class = (http.client.HTTPSConnection
+                            if parts.scheme == 'https'
+                            else http.client.HTTPConnection)
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.token = None
+
+    def request(self, method, path, body=None, content_type=None):
+        """Send a request and return (status, parsed JSON or None)."""
+        headers = {}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+        try:
+            self.connection.request(method, self.prefix + path, body,
+                                    headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0, None
+
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+class User:
+    """An API account with its recipes and tags."""
+
+    def __init__(self, email):
+        self.email = email
+        self.token = None
+        self.recipe_ids = []
+        self.tag_ids = []
+        self.ingredient_ids = []
+
+
+def _recipe_payload(index):
+    """Return a recipe with nested tags and ingredients to create."""
+    return {
+        'title': f'Load test recipe {index}',
+        'time_minutes': random.randint(5, 120),
+        'price': f'{random.uniform(1, 50):.2f}',
+        'tags': [{'name': f'tag-{random.randint(1, 20)}'}
+                 for _ in range(random.randint(1, 3))],
+        'ingredients': [{'name': f'ingredient-{random.randint(1, 100)}'}
+                        for _ in range(random.randint(2, 8))],
+    }
+
+
+def setup_users(base_url, count, recipes, timeout):
+    """Create users with tokens and seed recipes for them."""
+    run = uuid.uuid4().hex[:8]
+    users = []
+    client = Client(base_url, timeout)
+    for index in range(count):
+        user = User(f'loadtest-{run}-{index}@example.com')
+        client.token = None
+        status, _ = client.request('POST', '/api/user/create/', {
+            'email': user.email, 'password': PASSWORD, 'name': 'Load test'})
+        if status != 201:
+            raise SystemExit(f'Creating {user.email} failed with {status}')
+        status, data = client.request('POST', '/api/user/token/', {
+            'email': user.email, 'password': PASSWORD})
+        if status != 200:
+            raise SystemExit(f'Token for {user.email} failed with {status}')
+        user.token = client.token = data['token']
+
+        for recipe in range(recipes):
+            status, data = client.request('POST', '/api/recipe/recipes/',
+                                          _recipe_payload(recipe))
+            if status == 201:
+                user.recipe_ids.append(data['id'])
+        _, tags = client.request('GET', '/api/recipe/tags/')
+        _, ingredients = client.request('GET', '/api/recipe/ingredient/')
+        user.tag_ids = [tag['id'] for tag in tags or []]
+        user.ingredient_ids = [item['id'] for item in ingredients or []]
+        users.append(user)
+
+    return users
+
+
+def run_scenario(name, client, user):
+    """Run one scenario and return its HTTP status."""
+    if name == 'login':
+        client.token = None
+        status, _ = client.request('POST', '/api/user/token/', {
+            'email': user.email, 'password': PASSWORD})
+        client.token = user.token
+        return status
+    if name == 'list':
+        return client.request('GET', '/api/recipe/recipes/')[0]
+    if name == 'list_filtered':
+        params = {}
+        if user.tag_ids:
+            params['tags'] = ','.join(
+                str(tag_id) for tag_id in random.sample(
+                    user.tag_ids, min(2, len(user.tag_ids))))
+        if user.ingredient_ids and random.random() < 0.5:
+            params['ingredients'] = str(random.choice(user.ingredient_ids))
+        return client.request(
+            'GET', f'/api/recipe/recipes/?{urlencode(params)}')[0]
+    if name == 'detail':
+        if not user.recipe_ids:
+            return client.request('GET', '/api/recipe/recipes/')[0]
+        recipe_id = random.choice(user.recipe_ids)
+        return client.request('GET', f'/api/recipe/recipes/{recipe_id}/')[0]
+    if name == 'create':
+        status, data = client.request(
+            'POST', '/api/recipe/recipes/',
+            _recipe_payload(len(user.recipe_ids)))
+        if status == 201:
+            user.recipe_ids.append(data['id'])
+        return status
+    if name == 'upload_image':
+        if not user.recipe_ids:
+            return client.request('GET', '/api/recipe/recipes/')[0]
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; '
+                f'name="image"; filename="load.png"\r\n'
+                f'Content-Type: image/png\r\n\r\n').encode()
+        body += make_png() + f'\r\n--{boundary}--\r\n'.encode()
+        recipe_id = random.choice(user.recipe_ids)
+        return client.request(
+            'POST', f'/api/recipe/recipes/{recipe_id}/upload_image/', body,
+            f'multipart/form-data; boundary={boundary}')[0]
+
+    raise ValueError(f'Unknown scenario {name}')
+
+
+class LoadTest:
+    """Ramp concurrent clients through stages and record samples."""
+
+    def __init__(self, args, users):
+        self.args = args
+        self.users = users
+        self.active = 0
+        self.stage = None
+        self.stopped = threading.Event()
+        self.samples = []
+        self.lock = threading.Lock()
+        names = [name for name in SCENARIOS if args.weights.get(name, 0)]
+        self.names = names
+        self.weights = [args.weights[name] for name in names]
+
+    def worker(self, index):
+        """Run scenarios while this worker is within the active count."""
+        client = Client(self.args.base_url, self.args.timeout)
+        user = self.users[index % len(self.users)]
+        client.token = user.token
+        samples = []
+        while not self.stopped.is_set():
+            if index >= self.active:
+                time.sleep(0.05)
+                continue
+            name = random.choices(self.names, self.weights)[0]
+            stage = self.stage
+            start = time.perf_counter()
+            status = run_scenario(name, client, user)
+            samples.append((stage, name, status,
+                            time.perf_counter() - start))
+        with self.lock:
+            self.samples.extend(samples)
+
+    def run(self):
+        """Run every stage and return the report."""
+        most = max(concurrency for concurrency, _ in self.args.stages)
+        threads = [threading.Thread(target=self.worker, args=(index,),
+                                    daemon=True)
+                   for index in range(most)]
+        for thread in threads:
+            thread.start()
+
+        durations = {}
+        for concurrency, seconds in self.args.stages:
+            self.stage = f'{concurrency}x{seconds}s'
+            self.active = concurrency
+            start = time.perf_counter()
+            time.sleep(seconds)
+            durations[self.stage] = time.perf_counter() - start
+            print(f'stage {self.stage} done', file=sys.stderr)
+        self.stopped.set()
+        for thread in threads:
+            thread.join()
+
+        return report(self.samples, durations)
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    rank = max(int(round(fraction * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(samples, seconds):
+    """Return throughput, errors and latency percentiles of samples."""
+    latencies = sorted(latency for _, latency in samples)
+    errors = sum(1 for status, _ in samples if not 200 <= status < 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / seconds, 2) if seconds else None,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'max_ms': _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(seconds):
+    """Convert seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def report(samples, durations):
+    """Group samples by stage and endpoint."""
+    stages = {}
+    for stage, seconds in durations.items():
+        in_stage = [(name, status, latency)
+                    for sample_stage, name, status, latency in samples
+                    if sample_stage == stage]
+        endpoints = {
+            name: summarize([(status, latency)
+                             for sample_name, status, latency in in_stage
+                             if sample_name == name], seconds)
+            for name in sorted({name for name, _, _ in in_stage})
+        }
+        stages[stage] = {
+            'total': summarize([(status, latency)
+                                for _, status, latency in in_stage],
+                               seconds),
+            'endpoints': endpoints,
+        }
+
+    return {'stages': stages}
+
+
+def compare(old_path, new_path):
+    """Print p95 latency and throughput changes between two reports."""
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old, new = json.load(old_file), json.load(new_file)
+
+    for stage, results in new['stages'].items():
+        before = old['stages'].get(stage)
+        if before is None:
+            continue
+        rows = [('total', results['total'], before['total'])]
+        rows += [(name, stats, before['endpoints'].get(name))
+                 for name, stats in results['endpoints'].items()]
+        for name, stats, previous in rows:
+            if not previous or not previous['p95_ms']:
+                continue
+            change = (stats['p95_ms'] - previous['p95_ms']) \
+                / previous['p95_ms'] * 100
+            print(f'{stage:>12} {name:<14} p95 {previous["p95_ms"]:>9}ms '
+                  f'-> {stats["p95_ms"]:>9}ms ({change:+.1f}%)  '
+                  f'rps {previous["rps"]} -> {stats["rps"]}')
+
+
+def _stages(value):
+    """Parse 'concurrency:seconds,...' into a list of pairs."""
+    stages = []
+    for stage in value.split(','):
+        concurrency, seconds = stage.split(':')
+        stages.append((int(concurrency), float(seconds)))
+    return stages
+
+
+def _weights(value):
+    """Parse 'scenario=weight,...' over the default weights."""
+    weights = dict(SCENARIOS)
+    for item in filter(None, value.split(',')):
+        name, weight = item.split('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name}')
+        weights[name] = float(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--stages', type=_stages, default='1:10,10:20,50:20',
+                        help='Comma separated concurrency:seconds ramp.')
+    parser.add_argument('--weights', type=_weights, default='',
+                        help='Comma separated scenario=weight overrides.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--recipes', type=int, default=20,
+                        help='Recipes created per user before the run.')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help='Write the JSON report here.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compare two reports instead of running.')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    users = setup_users(args.base_url, args.users, args.recipes,
+                        args.timeout)
+    results = LoadTest(args, users).run()
+    results['config'] = {
+        'base_url': args.base_url,
+        'stages': args.stages,
+        'weights': args.weights,
+        'users': args.users,
+        'recipes': args.recipes,
+    }
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
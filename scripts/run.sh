@@ -5,5 +5,17 @@ set -e
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py createcachetable
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+# Workers write their metrics here so /metrics can sum them
+export METRICS_DIR="${METRICS_DIR:-/tmp/metrics}"
+mkdir -p "$METRICS_DIR"
+rm -f "$METRICS_DIR"/*.json
+
+# APP_SERVER=asgi serves the async views over HTTP with uvicorn, the
+# proxy must then be started with the same APP_SERVER
+if [ "${APP_SERVER:-uwsgi}" = "asgi" ]; then
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 --workers 4
+else
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi